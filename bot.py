@@ -2,38 +2,121 @@
 Streamlined Telegram Bot for Instagram downloading and reposting.
 """
 import os
+import signal
 import logging
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
 from dotenv import load_dotenv
 from telegram.ext import (
-    Application, CommandHandler, MessageHandler,
+    AIORateLimiter, Application, CommandHandler, MessageHandler,
     ConversationHandler, ContextTypes, filters
 )
 from telegram import Update
 from telegram.constants import ParseMode
 from instagram_manager import InstagramManager
 from storage import StorageHandler
-import threading
-import http.server
-import socketserver
 import asyncio
 import re
+import aiofiles
+from aiolimiter import AsyncLimiter
 from telegram import InputMediaPhoto, InputMediaVideo, InputMediaDocument
 
-# Load environment variables
+# Load environment variables once per process
 load_dotenv()
 
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Immutable process configuration, read from the environment once."""
+
+    telegram_token: str
+    proxy: str
+    data_dir: str
+    gdrive_creds: str
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            telegram_token=os.getenv('TELEGRAM_TOKEN'),
+            proxy=os.getenv('INSTAGRAM_PROXY'),
+            data_dir=os.getenv('DATA_DIR', 'data'),
+            gdrive_creds=os.getenv('GOOGLE_DRIVE_CREDENTIALS', 'credentials.json'),
+        )
+
+
+CONFIG = Config.from_env()
+
 # Enable logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.DEBUG
+    level=os.getenv('LOG_LEVEL', 'INFO')
 )
 logger = logging.getLogger(__name__)
 
-# Add console handler for immediate feedback
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-logger.addHandler(console_handler)
+# URL patterns compiled once at import; these run on every message
+_INSTAGRAM_URL_RE = re.compile(
+    r'https?://(?:www\.)?instagram\.com/(?:p|reel)/[a-zA-Z0-9_-]+/?(?:\?.*)?$'
+)
+_SHORTCODE_RE = re.compile(r'instagram\.com/p/([^/?]+)')
+
+# Translation table escaping Telegram MARKDOWN_V2 special characters in a
+# single C-level pass over the text
+_MD2_TABLE = str.maketrans({c: f'\\{c}' for c in '_*[]()~`>#+-=|{}.!'})
+
+# Media type dispatch by extension: O(1) set membership on one lowercased
+# suffix instead of repeated endswith scans per file
+_PHOTO_EXTS = frozenset({'.jpg', '.jpeg', '.png'})
+_VIDEO_EXTS = frozenset({'.mp4', '.mov'})
+
+# Caption header reused for every delivered post
+_CAPTION_HEADER = "📸 *Instagram Post*\n"
+
+# Canned replies for known Instagram login failures, keyed by the error
+# marker the client embeds in the exception message
+_LOGIN_ERROR_REPLIES = {
+    'network_error': (
+        "❌ Network connection error!\n\n"
+        "Could not reach Instagram servers. Please check your internet connection and try again later."
+    ),
+    'challenge_required': (
+        "❌ Instagram security challenge required!\n\n"
+        "Please login to your Instagram account through the app or website first to complete any security verifications, then try again."
+    ),
+    'invalid_user': (
+        "❌ Invalid Instagram username!\n\n"
+        "The username you provided doesn't seem to exist or might be suspended. Please double-check and try again."
+    ),
+    'bad_password': (
+        "❌ Incorrect password!\n\n"
+        "The password you provided is incorrect. Please try again."
+    ),
+}
+
+
+@lru_cache(maxsize=1024)
+def _check_instagram_url(text):
+    """Validate an Instagram post URL; memoized since users re-paste URLs."""
+    # Fast path: reject ordinary chatter without touching the regex engine
+    if not text.startswith(('http://', 'https://')) or 'instagram.com/' not in text:
+        return False
+    return bool(_INSTAGRAM_URL_RE.match(text))
+
+
+@lru_cache(maxsize=1024)
+def _extract_shortcode(text):
+    """Return the post shortcode from a URL, or None if absent."""
+    m = _SHORTCODE_RE.search(text)
+    return m.group(1) if m else None
+
+@dataclass(slots=True)
+class Session:
+    """Instagram session data for a logged-in Telegram user.
+
+    The plaintext password is not retained after login; the Instagram
+    client resumes from its cached session settings instead.
+    """
+    username: str
 
 # States
 (WAITING_FOR_URL, WAITING_FOR_USERNAME, WAITING_FOR_PASSWORD,
@@ -46,39 +129,52 @@ class InstaBot:
     A Telegram bot that can download and repost Instagram content.
     """
 
-    def __init__(self, token=None):
+    def __init__(self, token=None, config=None):
         """
         Initialize the bot.
-        
+
         Args:
-            token (str, optional): Custom token for the bot. If None, will use TELEGRAM_TOKEN from env.
+            token (str, optional): Custom token for the bot. If None, will use the configured token.
+            config (Config, optional): Process configuration. Defaults to the module-level CONFIG.
         """
-        # Load environment variables
-        load_dotenv()
-        
-        # Set up token
-        self.token = token or os.getenv('TELEGRAM_TOKEN')
+        # Configuration parsed once at module import; instances just read it
+        config = config or CONFIG
+        self.token = token or config.telegram_token
         if not self.token:
             raise ValueError("TELEGRAM_TOKEN environment variable not set")
-            
-        # Set up Instagram client and storage
-        proxy = os.getenv('INSTAGRAM_PROXY')
-        
+
         # Initialize storage with Google Drive support - force it to be enabled
         self.use_google_drive = True  # Always use Google Drive
         self.storage = StorageHandler(
-            data_dir=os.getenv('DATA_DIR', 'data'),
+            data_dir=config.data_dir,
             use_google_drive=True,  # Force Google Drive usage
-            credentials_file=os.getenv('GOOGLE_DRIVE_CREDENTIALS', 'credentials.json')
+            credentials_file=config.gdrive_creds
         )
-        
+
         # Pass storage handler to Instagram manager
-        self.instagram_manager = InstagramManager(proxy=proxy, storage_handler=self.storage)
+        self.instagram_manager = InstagramManager(proxy=config.proxy, storage_handler=self.storage)
         
-        # Keep track of logged in users
-        self.logged_in_users = set()
-        # Store Instagram sessions
+        # Instagram sessions keyed by Telegram user ID; presence == logged in
         self.user_sessions = {}
+
+        # Webhook Application, built lazily on the first update; the lock
+        # keeps concurrent first updates from initializing it twice
+        self._app = None
+        self._init_lock = asyncio.Lock()
+
+        # Per-chat work queues and their worker tasks; downloads for one
+        # chat run in order without holding up other chats
+        self._chat_queues = {}
+        self._chat_workers = {}
+
+        # Stay just under Telegram's ~30 msg/s bot-wide send limit so
+        # bursts don't trigger 429 retries inside PTB
+        self._send_limiter = AsyncLimiter(28, 1)
+
+        # Credential writes are queued and flushed by a background worker
+        # so the login path never waits on storage I/O
+        self._write_queue = asyncio.Queue()
+        self._write_worker = None
         
         # Load stored credentials
         self._load_stored_credentials()
@@ -88,7 +184,7 @@ class InstaBot:
         user_id = update.effective_user.id
         
         # Check if already logged in
-        if hasattr(self, 'logged_in_users') and user_id in self.logged_in_users:
+        if user_id in self.user_sessions:
             await update.message.reply_text(
                 "👋 Welcome back to InstaBot!\n\n"
                 "You're already logged in. Send me an Instagram post URL to repost it."
@@ -109,56 +205,104 @@ class InstaBot:
         This method downloads the Instagram post and sends it to the user.
         """
         user_id = update.effective_user.id
-        
+
         # Check if URL is in message text
         message_text = update.message.text.strip()
-        
+
         # Log the received URL
         logger.info(f"Received Instagram URL: {message_text}")
-        
+
         if not self._is_instagram_url(message_text):
             await update.message.reply_text("That doesn't look like an Instagram URL. Please send a valid Instagram post URL.")
             return
-        
+
+        # Get the Instagram session; the manager holds the actual login
+        session = self.user_sessions.get(user_id)
+        username = session.username if session else None
+
+        if not username:
+            await update.message.reply_text(
+                "You need to log in to Instagram first. Use /start to log in."
+            )
+            return
+
         # Send downloading message
         downloading_message = await update.message.reply_text("⏳ Downloading post...")
-        
+
+        # Hand the slow work to this chat's worker and return immediately:
+        # requests from one chat stay ordered, other chats aren't held up
+        chat_id = update.effective_chat.id
+        queue = self._chat_queues.get(chat_id)
+        if queue is None:
+            queue = self._chat_queues[chat_id] = asyncio.Queue()
+            self._chat_workers[chat_id] = asyncio.create_task(
+                self._run_chat_worker(chat_id)
+            )
+        await queue.put(
+            lambda: self._process_instagram_url(
+                update, message_text, downloading_message, username
+            )
+        )
+
+    async def _run_chat_worker(self, chat_id):
+        """Drain one chat's queue serially; errors never kill the worker."""
+        queue = self._chat_queues[chat_id]
+        while True:
+            job = await queue.get()
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"Chat worker error for {chat_id}: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    async def _process_instagram_url(self, update, message_text, downloading_message,
+                                     username):
+        """Download an Instagram post and deliver it; runs on a chat worker."""
         try:
-            # Get the Instagram credentials
-            username = self.user_sessions.get(user_id, {}).get('username')
-            password = self.user_sessions.get(user_id, {}).get('password')
-            
-            if not username or not password:
-                await update.message.reply_text(
-                    "You need to log in to Instagram first. Use /start to log in."
-                )
-                return
-            
             # Try to download the post directly without using Telegram's media_id parsing
             try:
                 # Extract shortcode from URL to avoid any URL parsing issues
-                shortcode_match = re.search(r'instagram\.com\/p\/([^\/\?]+)', message_text)
-                if not shortcode_match:
+                shortcode = _extract_shortcode(message_text)
+                if not shortcode:
                     await update.message.reply_text("Could not extract post ID from URL. Please make sure it's a valid Instagram post URL.")
                     return
-                
-                shortcode = shortcode_match.group(1)
+
                 logger.info(f"Extracted shortcode: {shortcode}")
-                
-                # Download the post directly using the Instagram manager
-                post_data = self.instagram_manager.download_instagram_post(message_text, username, password)
-                
+
+                # If this post was delivered before, resend the cached
+                # Telegram file_ids - no Instagram download, no re-upload
+                cached_media = self.storage.get_file_ids(shortcode)
+                if cached_media:
+                    await self._send_cached_media(update, cached_media)
+                    await downloading_message.edit_text("✅ Download complete!")
+                    return
+
+                # Download the post off the event loop so the worker's await
+                # points let other chats' handlers keep running
+                post_data = await asyncio.to_thread(
+                    self.instagram_manager.download_instagram_post,
+                    message_text, username
+                )
+
                 # Process the downloaded post data
                 caption = post_data.get('caption', 'Instagram Post')
                 media_files = post_data.get('media_files', [])
                 user_info = post_data.get('user_info', {})
-                
+
                 if not media_files:
                     raise ValueError("No media found in this post")
-                
-                # Send the media files
-                await self._send_media_files(update, media_files, caption, user_info)
-                
+
+                # Send the media files and cache the resulting file_ids
+                # along with the formatted caption, so cache hits look the
+                # same as first deliveries
+                file_ids = await self._send_media_files(update, media_files, caption, user_info)
+                if file_ids:
+                    self.storage.save_file_ids(shortcode, {
+                        'caption': self._format_caption(caption, user_info),
+                        'files': file_ids
+                    })
+
                 # Edit the downloading message to indicate success
                 await downloading_message.edit_text("✅ Download complete!")
                 
@@ -173,7 +317,7 @@ class InstaBot:
                 )
                 
         except Exception as e:
-            logger.error(f"Error in handle_instagram_url: {str(e)}")
+            logger.error(f"Error in _process_instagram_url: {str(e)}")
             await downloading_message.edit_text(
                 f"❌ Error: {str(e)}\n"
                 "Please try again or contact support if the issue persists."
@@ -188,83 +332,149 @@ class InstaBot:
             media_files (list): List of media file paths
             caption (str): Caption for the media
             user_info (dict): Information about the Instagram user
+
+        Returns:
+            list: [{'type': ..., 'file_id': ...}] for the sent media, so
+            callers can cache the Telegram uploads
         """
         if not media_files:
             await update.message.reply_text("No media files to send.")
-            return
-        
-        # Format caption with attribution
-        formatted_caption = f"📸 *Instagram Post*\n"
-        if user_info and user_info.get('username'):
-            formatted_caption += f"👤 @{user_info['username']}\n\n"
+            return []
         
-        formatted_caption += self._escape_markdown(caption[:1000] if caption else "")  # Limit caption length
+        formatted_caption = self._format_caption(caption, user_info)
         
         # If there's only one file, send it directly
         if len(media_files) == 1:
             file_path = media_files[0]
-            
+
+            # Read without blocking the event loop; the handle is closed
+            # deterministically instead of leaking until GC
+            async with aiofiles.open(file_path, 'rb') as f:
+                data = await f.read()
+
             # Check if it's an image or video
-            if file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                await update.message.reply_photo(
-                    photo=open(file_path, 'rb'),
-                    caption=formatted_caption,
-                    parse_mode=ParseMode.MARKDOWN_V2
-                )
-            elif file_path.lower().endswith(('.mp4', '.mov')):
-                await update.message.reply_video(
-                    video=open(file_path, 'rb'),
-                    caption=formatted_caption,
-                    parse_mode=ParseMode.MARKDOWN_V2
-                )
+            ext = os.path.splitext(file_path)[1].lower()
+            if ext in _PHOTO_EXTS:
+                async with self._send_limiter:
+                    msg = await update.message.reply_photo(
+                        photo=data,
+                        caption=formatted_caption,
+                        parse_mode=ParseMode.MARKDOWN_V2
+                    )
+                return [{'type': 'photo', 'file_id': msg.photo[-1].file_id}]
+            elif ext in _VIDEO_EXTS:
+                async with self._send_limiter:
+                    msg = await update.message.reply_video(
+                        video=data,
+                        caption=formatted_caption,
+                        parse_mode=ParseMode.MARKDOWN_V2
+                    )
+                return [{'type': 'video', 'file_id': msg.video.file_id}]
             else:
-                await update.message.reply_document(
-                    document=open(file_path, 'rb'),
-                    caption=formatted_caption,
-                    parse_mode=ParseMode.MARKDOWN_V2
-                )
+                async with self._send_limiter:
+                    msg = await update.message.reply_document(
+                        document=data,
+                        caption=formatted_caption,
+                        parse_mode=ParseMode.MARKDOWN_V2
+                    )
+                return [{'type': 'document', 'file_id': msg.document.file_id}]
         else:
-            # For multiple files, we need to send a media group
-            # First send the caption separately as media groups have limited caption support
-            await update.message.reply_text(
-                formatted_caption,
-                parse_mode=ParseMode.MARKDOWN_V2
-            )
-            
-            # Prepare media group
-            media = []
-            for file_path in media_files[:10]:  # Telegram limits to 10 files per group
-                if file_path.lower().endswith(('.jpg', '.jpeg', '.png')):
-                    media.append(InputMediaPhoto(media=open(file_path, 'rb')))
-                elif file_path.lower().endswith(('.mp4', '.mov')):
-                    media.append(InputMediaVideo(media=open(file_path, 'rb')))
+            # For multiple files, send one media group with the caption on
+            # its first item - one API call instead of a text message plus
+            # the group (Telegram shows the first item's caption under the
+            # whole album). Reads overlap; Telegram limits groups to 10.
+            media = list(await asyncio.gather(
+                *(self._build_input_media(p, formatted_caption if i == 0 else None)
+                  for i, p in enumerate(media_files[:10]))
+            ))
+
+            # Send the media group and collect the uploaded file_ids
+            async with self._send_limiter:
+                messages = await update.message.reply_media_group(media=media)
+            file_ids = []
+            for msg in messages:
+                if msg.photo:
+                    file_ids.append({'type': 'photo', 'file_id': msg.photo[-1].file_id})
+                elif msg.video:
+                    file_ids.append({'type': 'video', 'file_id': msg.video.file_id})
+                elif msg.document:
+                    file_ids.append({'type': 'document', 'file_id': msg.document.file_id})
+            return file_ids
+
+    def _format_caption(self, caption, user_info):
+        """Build the attributed, Markdown-escaped caption for a post.
+
+        Joins once instead of building intermediate strings with +=.
+        """
+        parts = [_CAPTION_HEADER]
+        if user_info and user_info.get('username'):
+            parts.append(f"👤 @{user_info['username']}\n\n")
+        parts.append(self._escape_markdown(caption[:1000] if caption else ""))  # Limit caption length
+        return ''.join(parts)
+
+    async def _build_input_media(self, file_path, caption=None):
+        """Read one file and wrap it in the matching InputMedia type."""
+        async with aiofiles.open(file_path, 'rb') as f:
+            data = await f.read()
+        kwargs = {}
+        if caption:
+            kwargs = {'caption': caption, 'parse_mode': ParseMode.MARKDOWN_V2}
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext in _PHOTO_EXTS:
+            return InputMediaPhoto(media=data, **kwargs)
+        elif ext in _VIDEO_EXTS:
+            return InputMediaVideo(media=data, **kwargs)
+        return InputMediaDocument(media=data, **kwargs)
+
+    async def _send_cached_media(self, update, cached_media):
+        """Resend previously uploaded media by Telegram file_id.
+
+        Telegram serves these from its own servers, so cache hits involve
+        no Instagram download and no upload bytes at all. The cached
+        caption (attribution included) rides along so a repeat delivery
+        looks the same as the first one.
+        """
+        caption = cached_media.get('caption')
+        file_ids = cached_media.get('files', [])
+        caption_kwargs = {}
+        if caption:
+            caption_kwargs = {'caption': caption, 'parse_mode': ParseMode.MARKDOWN_V2}
+
+        if len(file_ids) == 1:
+            entry = file_ids[0]
+            async with self._send_limiter:
+                if entry['type'] == 'photo':
+                    await update.message.reply_photo(photo=entry['file_id'], **caption_kwargs)
+                elif entry['type'] == 'video':
+                    await update.message.reply_video(video=entry['file_id'], **caption_kwargs)
                 else:
-                    media.append(InputMediaDocument(media=open(file_path, 'rb')))
-            
-            # Send the media group
+                    await update.message.reply_document(document=entry['file_id'], **caption_kwargs)
+            return
+
+        # The first item's caption shows under the whole album
+        media = []
+        for i, entry in enumerate(file_ids[:10]):
+            kwargs = caption_kwargs if i == 0 else {}
+            if entry['type'] == 'photo':
+                media.append(InputMediaPhoto(media=entry['file_id'], **kwargs))
+            elif entry['type'] == 'video':
+                media.append(InputMediaVideo(media=entry['file_id'], **kwargs))
+            else:
+                media.append(InputMediaDocument(media=entry['file_id'], **kwargs))
+        async with self._send_limiter:
             await update.message.reply_media_group(media=media)
-    
+
     def _escape_markdown(self, text):
         """Escape Markdown special characters for Telegram's MARKDOWN_V2 mode."""
         if not text:
             return ""
-        
-        # Characters that need to be escaped in MARKDOWN_V2
-        special_chars = ['_', '*', '[', ']', '(', ')', '~', '`', '>', '#', '+', '-', '=', '|', '{', '}', '.', '!']
-        
-        # Escape each special character with a backslash
-        for char in special_chars:
-            text = text.replace(char, f'\\{char}')
-        
-        return text
+
+        return text.translate(_MD2_TABLE)
     
     def _is_instagram_url(self, text):
         """Check if the given text is an Instagram URL."""
         # Handle both www and non-www versions, as well as new Instagram URL formats
-        instagram_pattern = re.compile(
-            r'https?://(?:www\.)?instagram\.com/(?:p|reel)/[a-zA-Z0-9_-]+/?(?:\?.*)?$'
-        )
-        return bool(instagram_pattern.match(text))
+        return _check_instagram_url(text)
     
     async def process_username(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Process Instagram username for downloading."""
@@ -306,23 +516,12 @@ class InstaBot:
                 success = self.instagram_manager.login(username, password)
                 
                 if success:
-                    # Store user info in the user_data
-                    context.user_data['instagram'] = {
-                        'username': username,
-                        'password': password
-                    }
-                    
-                    # Add user to logged in users
-                    self.logged_in_users.add(user_id)
-                    
-                    # Save credentials in user_sessions
-                    self.user_sessions[user_id] = {
-                        'username': username,
-                        'password': password
-                    }
+                    # Record the session; the plaintext password is only
+                    # forwarded to storage, never kept in memory
+                    self.user_sessions[user_id] = Session(username)
                     
                     # Save to storage
-                    self.storage.save_credentials(user_id, username, password)
+                    await self._persist_credentials(user_id, username, password)
                     
                     await update.message.reply_text(
                         f"✅ Successfully logged in as {username}!\n\n"
@@ -338,33 +537,14 @@ class InstaBot:
                     
             except Exception as e:
                 error_message = str(e).lower()
-                
-                if "network_error" in error_message:
-                    await update.message.reply_text(
-                        "❌ Network connection error!\n\n"
-                        "Could not reach Instagram servers. Please check your internet connection and try again later."
-                    )
-                elif "challenge_required" in error_message:
-                    await update.message.reply_text(
-                        "❌ Instagram security challenge required!\n\n"
-                        "Please login to your Instagram account through the app or website first to complete any security verifications, then try again."
-                    )
-                elif "invalid_user" in error_message:
-                    await update.message.reply_text(
-                        "❌ Invalid Instagram username!\n\n"
-                        "The username you provided doesn't seem to exist or might be suspended. Please double-check and try again."
-                    )
-                elif "bad_password" in error_message:
-                    await update.message.reply_text(
-                        "❌ Incorrect password!\n\n"
-                        "The password you provided is incorrect. Please try again."
-                    )
-                else:
-                    await update.message.reply_text(
-                        f"❌ Login failed: {str(e)}\n"
-                        "Please try again with /start"
-                    )
-                
+
+                reply = next(
+                    (text for marker, text in _LOGIN_ERROR_REPLIES.items()
+                     if marker in error_message),
+                    f"❌ Login failed: {str(e)}\nPlease try again with /start"
+                )
+                await update.message.reply_text(reply)
+
                 return WAITING_FOR_USERNAME
             
         except Exception as e:
@@ -381,7 +561,7 @@ class InstaBot:
             user_id = update.effective_user.id
             
             # Check if user is logged in
-            if user_id not in self.logged_in_users:
+            if user_id not in self.user_sessions:
                 await update.message.reply_text(
                     "❌ You need to log in first.\n"
                     "Please use /start to log in."
@@ -448,14 +628,11 @@ class InstaBot:
         """Logout from Instagram."""
         user_id = update.effective_user.id
         
-        if user_id in self.logged_in_users:
-            # Remove user from logged in users
-            self.logged_in_users.remove(user_id)
-            
+        if user_id in self.user_sessions:
             # Remove session data
-            if user_id in self.user_sessions:
-                del self.user_sessions[user_id]
-            
+            del self.user_sessions[user_id]
+
+
             # Remove from storage
             self.storage.delete_credentials(user_id)
             
@@ -491,7 +668,7 @@ class InstaBot:
         """Send a message when the command /status is issued."""
         await update.message.reply_text(
             "🔄 Bot status: Online\n"
-            f"📊 Users logged in: {len(self.logged_in_users)}\n"
+            f"📊 Users logged in: {len(self.user_sessions)}\n"
         )
     
     async def error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -519,7 +696,7 @@ class InstaBot:
         user_id = update.effective_user.id
         
         # Check if the user is logged in
-        if user_id not in self.logged_in_users:
+        if user_id not in self.user_sessions:
             await update.message.reply_text(
                 "❌ You are not logged in to any Instagram account.\n"
                 "Use /start to log in with your Instagram credentials."
@@ -527,8 +704,8 @@ class InstaBot:
             return WAITING_FOR_USERNAME if context.user_data.get('state') == WAITING_FOR_USERNAME else ConversationHandler.END
         
         # Get user's Instagram credentials from user_sessions (more reliable)
-        session_data = self.user_sessions.get(user_id, {})
-        username = session_data.get('username', 'Unknown')
+        session = self.user_sessions.get(user_id)
+        username = session.username if session else 'Unknown'
         
         logger.debug(f"Retrieved username from session: {username}")
         
@@ -652,60 +829,141 @@ class InstaBot:
         
         app.add_error_handler(self.error_handler)
 
-    async def run_async(self):
-        """Start the bot asynchronously."""
-        # Create application instance
-        app = Application.builder().token(self.token).concurrent_updates(True).build()
-        
-        # Explicitly delete webhook to avoid conflicts
-        logger.info("Deleting any existing webhook...")
+    async def _post_init(self, app):
+        """Run startup work on the application's own event loop.
+
+        Deletes any existing webhook through PTB's pooled HTTP client instead
+        of a blocking requests call, so startup doesn't stall the event loop.
+        """
         try:
-            import requests
-            # Fix possible newline issues in token
-            clean_token = self.token.strip()
-            response = requests.get(f"https://api.telegram.org/bot{clean_token}/deleteWebhook?drop_pending_updates=true")
-            logger.info(f"Webhook deletion response: {response.json()}")
+            await app.bot.delete_webhook(drop_pending_updates=True)
+            logger.info("Deleted any existing webhook")
         except Exception as e:
             logger.error(f"Error deleting webhook: {e}")
-        
+
+        # Set up bot commands menu before the first updates are dispatched
+        await self.set_commands(app)
+
+    async def _persist_credentials(self, user_id, username, password):
+        """Queue a credential write for the background flusher.
+
+        The in-memory session is already updated by the caller; storage
+        (local JSON plus Google Drive) is written off the request path.
+        """
+        if self._write_worker is None:
+            self._write_worker = asyncio.create_task(self._drain_write_queue())
+        await self._write_queue.put((user_id, username, password))
+
+    async def _drain_write_queue(self):
+        """Flush queued credential writes to storage, one at a time."""
+        while True:
+            user_id, username, password = await self._write_queue.get()
+            try:
+                await asyncio.to_thread(
+                    self.storage.save_credentials, user_id, username, password
+                )
+            except Exception as e:
+                # The session stays usable; the write is retried on the
+                # user's next login
+                logger.error(f"Failed to persist credentials for user {user_id}: {e}")
+            finally:
+                self._write_queue.task_done()
+
+    def _builder(self):
+        """Shared Application builder with concurrent dispatch and send rate limiting.
+
+        Telegram enforces ~30 messages/s per bot; PTB's AIORateLimiter
+        smooths bursts below that ceiling and retries RetryAfter
+        responses instead of letting flood-wait errors surface.
+        """
+        return (
+            Application.builder()
+            .token(self.token)
+            .concurrent_updates(True)
+            .rate_limiter(AIORateLimiter(overall_max_rate=30, overall_time_period=1))
+        )
+
+    async def _health(self, reader, writer):
+        """Answer the Render health check with a static HTTP 200 response."""
+        await reader.read(1024)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/html\r\n"
+            b"Content-Length: 25\r\n"
+            b"\r\n"
+            b"Instagram Bot is running!"
+        )
+        await writer.drain()
+        writer.close()
+
+    async def run_async(self):
+        """Start the bot asynchronously."""
+        # Create application instance
+        app = self._builder().post_init(self._post_init).build()
+
         # Register handlers
         self.register_handlers(app)
-        
-        # Set up bot commands menu - properly await the coroutine
-        await self.set_commands(app)
-        
+
+        # Serve the Render health endpoint on the same event loop -
+        # no extra thread and no blocking accept loop
+        health_server = None
+        if os.getenv('RENDER', 'false').lower() == 'true':
+            port = int(os.getenv('PORT', 10000))
+            health_server = await asyncio.start_server(self._health, "", port)
+            logger.info(f"Health endpoint listening on port {port}")
+
         # Start the bot
         print("Bot starting...")
         logging.info("Bot starting...")
         await app.initialize()
         await app.start()
-        await app.updater.start_polling()
-        
+        # Long-poll: let getUpdates block server-side for up to 30s and
+        # re-issue immediately instead of sleeping between polls
+        await app.updater.start_polling(
+            poll_interval=0, timeout=30, drop_pending_updates=True
+        )
+
+        # Park on a future resolved by SIGTERM/SIGINT so container stops
+        # (docker, k8s) shut down cleanly instead of relying on
+        # KeyboardInterrupt reaching the event loop
+        loop = asyncio.get_running_loop()
+        stop = loop.create_future()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, lambda: stop.done() or stop.set_result(None))
+            except NotImplementedError:
+                # Signal handlers are unavailable on some platforms (Windows)
+                pass
+
         try:
-            # Keep the bot running
-            await asyncio.Event().wait()
+            await stop
+            logger.info("Bot shutting down...")
         except (KeyboardInterrupt, SystemExit):
             # Handle graceful shutdown
             logger.info("Bot shutting down...")
         finally:
-            # Clean shutdown
+            # Clean shutdown; flush any pending credential writes first
+            await self._write_queue.join()
+            if health_server is not None:
+                health_server.close()
             await app.stop()
             await app.updater.stop()
             await app.shutdown()
             
-    async def setup_webhook(self, webhook_url):
+    async def setup_webhook(self, webhook_url, secret_token=None):
         """Set up webhook mode for the bot."""
         # Create application instance
-        app = Application.builder().token(self.token).concurrent_updates(True).build()
-        
+        app = self._builder().build()
+
         # Register handlers
         self.register_handlers(app)
-        
+
         # Set up bot commands menu - properly await the coroutine
         await self.set_commands(app)
-        
-        # Set webhook
-        await app.bot.set_webhook(webhook_url)
+
+        # Set webhook, replacing any stale one left by a previous deploy
+        await app.bot.delete_webhook(drop_pending_updates=True)
+        await app.bot.set_webhook(webhook_url, secret_token=secret_token)
         
         # Initialize the app (but don't start polling)
         await app.initialize()
@@ -716,22 +974,27 @@ class InstaBot:
     
     async def process_update(self, update_json):
         """Process a single update from the webhook."""
-        if not hasattr(self, '_app'):
-            # Create application instance if not already created
-            self._app = Application.builder().token(self.token).concurrent_updates(True).build()
-            
-            # Set application attribute to save conversations
-            self._app.bot_data['instagram_bot'] = self
-            
-            # Register handlers
-            self.register_handlers(self._app)
-            
-            # Initialize the app
-            await self._app.initialize()
-            await self._app.start()
-            
-            logger.info("Application initialized for webhook processing")
-        
+        if self._app is None:
+            # Double-checked init: only the first update pays for it, and
+            # concurrent first updates wait instead of racing
+            async with self._init_lock:
+                if self._app is None:
+                    app = self._builder().build()
+
+                    # Set application attribute to save conversations
+                    app.bot_data['instagram_bot'] = self
+
+                    # Register handlers
+                    self.register_handlers(app)
+
+                    # Initialize the app
+                    await app.initialize()
+                    await app.start()
+
+                    self._app = app
+                    logger.info("Application initialized for webhook processing")
+
+
         # Create update object
         update = Update.de_json(update_json, self._app.bot)
         
@@ -747,27 +1010,16 @@ class InstaBot:
     def run(self):
         """Start the bot."""
         # Create application instance
-        app = Application.builder().token(self.token).concurrent_updates(True).build()
-        
-        # Explicitly delete webhook to avoid conflicts
-        logger.info("Deleting any existing webhook...")
-        try:
-            import requests
-            response = requests.get(f"https://api.telegram.org/bot{self.token}/deleteWebhook?drop_pending_updates=true")
-            logger.info(f"Webhook deletion response: {response.json()}")
-        except Exception as e:
-            logger.error(f"Error deleting webhook: {e}")
-        
+        app = self._builder().post_init(self._post_init).build()
+
         # Register handlers
         self.register_handlers(app)
-        
-        # Set up bot commands menu
-        app.create_task(self.set_commands(app))
-        
+
         # Start the bot
         print("Bot starting...")
         logging.info("Bot starting...")
-        app.run_polling(poll_interval=1.0)
+        # Long-poll instead of sleeping 1s between getUpdates calls
+        app.run_polling(poll_interval=0, timeout=30, drop_pending_updates=True)
         
     def _load_stored_credentials(self):
         """Load stored credentials from storage."""
@@ -777,11 +1029,7 @@ class InstaBot:
             for creds in stored_credentials:
                 if 'user_id' in creds:
                     user_id = int(creds['user_id'])
-                    self.user_sessions[user_id] = {
-                        'username': creds['username'],
-                        'password': creds['password']
-                    }
-                    self.logged_in_users.add(user_id)
+                    self.user_sessions[user_id] = Session(creds['username'])
         except Exception as e:
             logging.error(f"Failed to load stored credentials: {e}")
 
@@ -790,27 +1038,26 @@ class InstaBot:
         user_id = update.effective_user.id
         
         # Check if user is logged in to Instagram
-        username = self.user_sessions.get(user_id, {}).get('username')
-        password = self.user_sessions.get(user_id, {}).get('password')
-        
-        if not username or not password:
+        session = self.user_sessions.get(user_id)
+        username = session.username if session else None
+
+        if not username:
             await update.message.reply_text(
                 "🔐 You need to log in to Instagram first.\n\n"
                 "Use /start to log in to your Instagram account."
             )
             return ConversationHandler.END
-        
+
         # Ask for the Instagram URL
         await update.message.reply_text(
             "📱 *Instagram Repost*\n\n"
             "Please send me the URL of the Instagram post you want to repost.",
             parse_mode=ParseMode.MARKDOWN_V2
         )
-        
-        # Store the username and password in context for later use
+
+        # Store the username in context for later use
         context.user_data['instagram_username'] = username
-        context.user_data['instagram_password'] = password
-        
+
         return WAITING_FOR_URL_REPOST
     
     async def handle_repost_url(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -847,31 +1094,30 @@ class InstaBot:
         
         # Get Instagram credentials
         username = context.user_data.get('instagram_username')
-        password = context.user_data.get('instagram_password')
-        
-        if not username or not password:
+
+        if not username:
             await update.message.reply_text(
                 "🔐 You need to log in to Instagram first.\n\n"
                 "Use /start to log in to your Instagram account."
             )
             return ConversationHandler.END
-        
+
         # Get the caption from the message or use original
         caption = None
         if update.message.text.strip().lower() == "/original":
             caption = "original"
         else:
             caption = update.message.text.strip()
-        
+
         # Send processing message
         processing_message = await update.message.reply_text(
             "⏳ Processing your repost request...\n"
             "This may take a moment as I fetch and prepare the content."
         )
-        
+
         try:
             # Download the post (this happens in the background)
-            post_data = self.instagram_manager.download_instagram_post(post_url, username, password)
+            post_data = self.instagram_manager.download_instagram_post(post_url, username)
             
             # If user requested to use original caption and we have it
             if caption is None and post_data.get('caption'):
@@ -917,27 +1163,26 @@ class InstaBot:
         user_id = update.effective_user.id
         
         # Check if user is logged in to Instagram
-        username = self.user_sessions.get(user_id, {}).get('username')
-        password = self.user_sessions.get(user_id, {}).get('password')
-        
-        if not username or not password:
+        session = self.user_sessions.get(user_id)
+        username = session.username if session else None
+
+        if not username:
             await update.message.reply_text(
                 "🔐 You need to log in to Instagram first.\n\n"
                 "Use /start to log in to your Instagram account."
             )
             return ConversationHandler.END
-        
+
         # Ask for the Instagram URL
         await update.message.reply_text(
             "📱 *Direct Instagram Repost*\n\n"
             "Please send me the URL of the Instagram post you want to repost.",
             parse_mode=ParseMode.MARKDOWN_V2
         )
-        
-        # Store the username and password in context for later use
+
+        # Store the username in context for later use
         context.user_data['instagram_username'] = username
-        context.user_data['instagram_password'] = password
-        
+
         return WAITING_FOR_DIRECT_REPOST_URL
     
     async def handle_direct_repost_url(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -974,35 +1219,33 @@ class InstaBot:
         
         # Get Instagram credentials
         username = context.user_data.get('instagram_username')
-        password = context.user_data.get('instagram_password')
-        
-        if not username or not password:
+
+        if not username:
             await update.message.reply_text(
                 "🔐 You need to log in to Instagram first.\n\n"
                 "Use /start to log in to your Instagram account."
             )
             return ConversationHandler.END
-        
+
         # Get the caption from the message or use original
         caption = None
         if update.message.text.strip().lower() == "/original":
             caption = "original"
         else:
             caption = update.message.text.strip()
-        
+
         # Send processing message
         processing_message = await update.message.reply_text(
             "⏳ Reposting directly to Instagram...\n"
             "This may take a moment as I process your request."
         )
-        
+
         try:
             # Use the direct repost method to handle everything in one step
             result = self.instagram_manager.direct_repost(
                 post_url=post_url,
                 new_caption=caption,
-                instagram_username=username,
-                instagram_password=password
+                instagram_username=username
             )
             
             if result.get('success'):
@@ -1033,27 +1276,26 @@ class InstaBot:
         user_id = update.effective_user.id
         
         # Check if user is logged in to Instagram
-        username = self.user_sessions.get(user_id, {}).get('username')
-        password = self.user_sessions.get(user_id, {}).get('password')
-        
-        if not username or not password:
+        session = self.user_sessions.get(user_id)
+        username = session.username if session else None
+
+        if not username:
             await update.message.reply_text(
                 "🔐 You need to log in to Instagram first.\n\n"
                 "Use /start to log in to your Instagram account."
             )
             return ConversationHandler.END
-        
+
         # Ask for the Instagram URL
         await update.message.reply_text(
             "📱 *Preview Instagram Repost*\n\n"
             "Please send me the URL of the Instagram post you want to preview and repost.",
             parse_mode=ParseMode.MARKDOWN_V2
         )
-        
-        # Store the username and password in context for later use
+
+        # Store the username in context for later use
         context.user_data['instagram_username'] = username
-        context.user_data['instagram_password'] = password
-        
+
         return WAITING_FOR_PREVIEW_URL
     
     async def handle_preview_url(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -1072,17 +1314,16 @@ class InstaBot:
         
         # Get Instagram credentials from context
         username = context.user_data.get('instagram_username')
-        password = context.user_data.get('instagram_password')
-        
+
         # Send processing message
         processing_message = await update.message.reply_text(
             "⏳ Downloading post details for preview...\n"
             "This may take a moment."
         )
-        
+
         try:
             # Download the post to get its details
-            post_data = self.instagram_manager.download_instagram_post(message_text, username, password)
+            post_data = self.instagram_manager.download_instagram_post(message_text, username)
             
             # Store post data for later use
             context.user_data['preview_post_data'] = post_data
@@ -1159,11 +1400,7 @@ class InstaBot:
         repost_message = await update.message.reply_text("⏳ Reposting to Instagram...")
         
         try:
-            # Get Instagram credentials
-            username = context.user_data.get('instagram_username')
-            password = context.user_data.get('instagram_password')
-            
-            # Repost to Instagram
+            # Repost to Instagram (the manager holds the login)
             result = self.instagram_manager.repost_to_instagram(
                 post_data['local_path'],
                 caption,
@@ -1193,30 +1430,8 @@ class InstaBot:
         
         return ConversationHandler.END
 
-# Simple HTTP request handler for Render
-class SimpleHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(b'Instagram Bot is running!')
-
-def start_web_server():
-    """Start a simple web server to keep Render happy"""
-    port = int(os.getenv('PORT', 10000))
-    handler = SimpleHTTPRequestHandler
-    
-    with socketserver.TCPServer(("", port), handler) as httpd:
-        print(f"Web server running on port {port}")
-        httpd.serve_forever()
-
 if __name__ == '__main__':
-    # Start web server in a separate thread for Render
-    if os.getenv('RENDER', 'false').lower() == 'true':
-        web_thread = threading.Thread(target=start_web_server)
-        web_thread.daemon = True
-        web_thread.start()
-    
-    # Create and start the bot
+    # Create and start the bot; run_async serves the Render health
+    # endpoint on the same event loop when RENDER=true
     bot = InstaBot()
     asyncio.run(bot.run_async())
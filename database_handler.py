@@ -1,28 +1,87 @@
 import os
 import json
-from pymongo import MongoClient
+import atexit
+import hashlib
+import aiofiles
+from cachetools import TTLCache
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
 from datetime import datetime
 from pathlib import Path
-from bson.binary import Binary
+from bson.objectid import ObjectId
 from typing import Optional, Dict, Any, Tuple
 
-class DatabaseHandler:
-    def __init__(self):
-        # MongoDB connection
+# One Motor client per process: every DatabaseHandler shares its connection
+# pool instead of paying a fresh TCP/TLS/SCRAM handshake per instance.
+# The client connects lazily, so creating it here is fork-safe.
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def _get_client() -> AsyncIOMotorClient:
+    global _client
+    if _client is None:
         mongo_uri = os.getenv('MONGODB_URI')
         if not mongo_uri:
             raise ValueError("MONGODB_URI environment variable not set")
-            
-        self.mongo_client = MongoClient(mongo_uri)
+
+        _client = AsyncIOMotorClient(
+            mongo_uri,
+            maxPoolSize=50,
+            minPoolSize=5,
+            maxIdleTimeMS=60000,
+            serverSelectionTimeoutMS=3000,
+            retryWrites=True,
+        )
+        atexit.register(_client.close)
+    return _client
+
+
+class DatabaseHandler:
+    def __init__(self):
+        # MongoDB connection (shared, pooled client)
+        self.mongo_client = _get_client()
         self.db = self.mongo_client['insta_bot']
         self.credentials = self.db['credentials']
-        self.files = self.db['files']
+        # GridFS chunks media at 255 KB, so uploads stream instead of
+        # buffering whole files and the 16 MB BSON document limit no
+        # longer caps video size
+        self.files = AsyncIOMotorGridFSBucket(self.db, bucket_name='media')
         self.posts = self.db['posts']
-        
-    def save_credentials(self, user_id: int, username: str, password: str) -> bool:
+
+        # Credentials change rarely but are read on every handler hit;
+        # cache them for an hour and invalidate on write
+        self._creds_cache: TTLCache = TTLCache(maxsize=10_000, ttl=3600)
+
+        # On-disk post cache keyed by a stable digest of the post URL
+        self.cache_dir = Path('cache')
+        self.cache_dir.mkdir(exist_ok=True)
+
+        # Index creation needs a running loop, so it happens lazily on
+        # the first database call instead of in the constructor
+        self._indexes_ready = False
+
+    async def ensure_indexes(self) -> None:
+        """Create the indexes the query paths rely on; idempotent"""
+        if self._indexes_ready:
+            return
+        # save_credentials upserts on user_id and there is one credentials
+        # document per user, so user_id alone is the unique key; the index
+        # also serves get_credentials' (user_id, active) filter. Without
+        # these every lookup is a collection scan.
+        await self.credentials.create_indexes([
+            IndexModel([('user_id', ASCENDING)], unique=True),
+        ])
+        await self.posts.create_indexes([
+            IndexModel([('user_id', ASCENDING), ('created_at', DESCENDING)]),
+            IndexModel([('post_url', ASCENDING)], unique=True, sparse=True),
+        ])
+        self._indexes_ready = True
+
+    async def save_credentials(self, user_id: int, username: str, password: str) -> bool:
         """Save Instagram credentials for a user"""
         try:
-            self.credentials.update_one(
+            await self.ensure_indexes()
+            await self.credentials.update_one(
                 {'user_id': user_id},
                 {
                     '$set': {
@@ -34,66 +93,149 @@ class DatabaseHandler:
                 },
                 upsert=True
             )
+            # Drop any cached copy so the next read sees the new values
+            self._creds_cache.pop(user_id, None)
             return True
         except Exception as e:
             print(f"Error saving credentials: {e}")
             return False
-        
-    def get_credentials(self, user_id: int) -> Optional[Dict[str, str]]:
+
+    async def get_credentials(self, user_id: int) -> Optional[Dict[str, str]]:
         """Retrieve Instagram credentials for a user"""
-        creds = self.credentials.find_one({'user_id': user_id, 'active': True})
+        cached = self._creds_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        await self.ensure_indexes()
+        creds = await self.credentials.find_one({'user_id': user_id, 'active': True})
         if creds:
-            return {
+            result = {
                 'username': creds['username'],
                 'password': creds['password']
             }
+            self._creds_cache[user_id] = result
+            return result
         return None
         
-    def save_media_file(self, file_path: str, media_type: str) -> Optional[str]:
-        """Save media file to MongoDB"""
+    async def load_all_credentials(self) -> Dict[int, Dict[str, str]]:
+        """Load every active credential set in one cursor pass.
+
+        Returns:
+            dict: {user_id: {'username': ..., 'password': ...}}
+        """
+        await self.ensure_indexes()
+        sessions: Dict[int, Dict[str, str]] = {}
+        # Project only the fields the sessions dict needs and pull them in
+        # large batches - one query, one server-side scan
+        cursor = self.credentials.find(
+            {'active': True},
+            {'user_id': 1, 'username': 1, 'password': 1, '_id': 0}
+        ).batch_size(1000)
+        async for doc in cursor:
+            sessions[int(doc['user_id'])] = {
+                'username': doc['username'],
+                'password': doc['password']
+            }
+        return sessions
+
+    async def save_media_file(self, file_path: str, media_type: str) -> Optional[str]:
+        """Stream a media file into GridFS"""
         try:
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-                file_id = self.files.insert_one({
-                    'data': Binary(file_data),
-                    'type': media_type,
-                    'created_at': datetime.utcnow()
-                }).inserted_id
-                return str(file_id)
+            # upload_from_stream needs a synchronous read(); feed GridFS
+            # chunk by chunk from aiofiles instead so neither side blocks
+            # the loop and memory stays bounded
+            grid_in = self.files.open_upload_stream(
+                os.path.basename(file_path),
+                metadata={'type': media_type, 'created_at': datetime.utcnow()}
+            )
+            try:
+                async with aiofiles.open(file_path, 'rb') as f:
+                    while chunk := await f.read(1024 * 1024):
+                        await grid_in.write(chunk)
+            finally:
+                await grid_in.close()
+            return str(grid_in._id)
         except Exception as e:
             print(f"Error saving file: {e}")
             return None
 
-    def get_media_file(self, file_id: str) -> Optional[bytes]:
-        """Get media file from MongoDB"""
-        file_doc = self.files.find_one({'_id': file_id})
-        if file_doc:
-            return file_doc['data']
-        return None
+    async def get_media_file(self, file_id: str, output_path: str) -> bool:
+        """Stream a media file out of GridFS to a local path"""
+        try:
+            stream = await self.files.open_download_stream(ObjectId(file_id))
+            async with aiofiles.open(output_path, 'wb') as f:
+                while True:
+                    chunk = await stream.readchunk()
+                    if not chunk:
+                        break
+                    await f.write(chunk)
+            return True
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return False
 
-    def save_post_data(self, user_id: int, post_data: Dict[str, Any], file_ids: list) -> bool:
+    async def save_post_data(self, user_id: int, post_data: Dict[str, Any], file_ids: list) -> bool:
         """Save post data and associated files to MongoDB"""
         try:
-            self.posts.insert_one({
-                'user_id': user_id,
-                'original_username': post_data.get('username'),
-                'caption': post_data.get('caption'),
-                'file_ids': file_ids,
-                'created_at': datetime.utcnow()
-            })
+            await self.ensure_indexes()
+            post_url = post_data.get('url')
+            await self.posts.update_one(
+                {'post_url': post_url},
+                {
+                    '$set': {
+                        'user_id': user_id,
+                        'original_username': post_data.get('username'),
+                        'caption': post_data.get('caption'),
+                        'file_ids': file_ids,
+                        'created_at': datetime.utcnow()
+                    },
+                    # Bumping the version lazily invalidates any cached copy
+                    '$inc': {'version': 1}
+                },
+                upsert=True
+            )
             return True
         except Exception as e:
             print(f"Error saving post data: {e}")
             return False
-        cache_file = self.cache_dir / f"{hash(post_url)}.json"
+
+    @staticmethod
+    def _post_cache_key(post_url: str) -> str:
+        # hash() is randomized per process by PYTHONHASHSEED, so keys
+        # derived from it never survive a restart; sha256 is stable
+        return hashlib.sha256(post_url.encode('utf-8')).hexdigest()[:16]
+
+    async def get_cached_post(self, post_url: str) -> Optional[Dict[str, Any]]:
+        """Return cached post data for a URL, or None if absent/stale.
+
+        Entries carry the post's version: a cheap projected find_one
+        confirms the cached copy matches the database before it is
+        served, with the TTL as a fallback bound on staleness.
+        """
+        cache_file = self.cache_dir / f"{self._post_cache_key(post_url)}.json"
         if not cache_file.exists():
             return None
-            
+
         with open(cache_file, 'r') as f:
             cache_data = json.load(f)
-            
+
         if datetime.utcnow().timestamp() > cache_data['expires_at']:
             cache_file.unlink()  # Delete expired cache
             return None
-            
+
+        current = await self.posts.find_one({'post_url': post_url}, {'version': 1})
+        if current and current.get('version') != cache_data.get('version'):
+            cache_file.unlink()  # A write superseded this entry
+            return None
+
         return cache_data['data']
+
+    def cache_post(self, post_url: str, data: Dict[str, Any], version: int = 1, ttl: int = 3600) -> None:
+        """Cache post data for a URL with its version and a TTL in seconds"""
+        cache_file = self.cache_dir / f"{self._post_cache_key(post_url)}.json"
+        with open(cache_file, 'w') as f:
+            json.dump({
+                'version': version,
+                'expires_at': datetime.utcnow().timestamp() + ttl,
+                'data': data
+            }, f)
@@ -6,13 +6,14 @@ def encode_file(filename):
     if not os.path.exists(filename):
         print(f"Error: {filename} does not exist")
         return
-    
+
+    # These are small JSON credential files; encode them in one shot
     with open(filename, 'rb') as f:
-        encoded = base64.b64encode(f.read()).decode('utf-8')
-        print(f"\n=== {filename} Base64 Encoded ===")
-        print(encoded)
-        print(f"=== End of {filename} ===\n")
-        return encoded
+        encoded = base64.b64encode(f.read()).decode('ascii')
+    print(f"\n=== {filename} Base64 Encoded ===")
+    print(encoded)
+    print(f"=== End of {filename} ===\n")
+    return encoded
 
 if __name__ == "__main__":
     print("Encoding Google Drive credentials and token for Render.com deployment")
@@ -0,0 +1,29 @@
+"""Thin JSON shim: orjson when installed, stdlib json otherwise.
+
+orjson parses a few times faster and serializes roughly an order of
+magnitude faster than the stdlib; every hot JSON path (webhook bodies,
+credential files, caches) should import loads/dumps from here so the
+speedup applies wherever the wheel is available.
+"""
+
+try:
+    import orjson as _orjson
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return _orjson.loads(data)
+
+    def dumps(obj):
+        """Serialize to a JSON str."""
+        return _orjson.dumps(obj).decode('utf-8')
+
+except ImportError:  # pragma: no cover - depends on environment
+    import json as _json
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return _json.loads(data)
+
+    def dumps(obj):
+        """Serialize to a JSON str."""
+        return _json.dumps(obj)
@@ -1,4 +1,5 @@
 import os
+import json
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
@@ -25,8 +26,8 @@ def authenticate():
     # Check if token.json exists
     if os.path.exists(token_file):
         try:
-            creds = Credentials.from_authorized_user_info(
-                eval(open(token_file, 'r').read()), SCOPES)
+            with open(token_file, 'r') as f:
+                creds = Credentials.from_authorized_user_info(json.load(f), SCOPES)
         except Exception as e:
             logger.error(f"Error loading credentials: {e}")
     
@@ -37,11 +38,14 @@ def authenticate():
         
         # Save the credentials for the next run
         with open(token_file, 'w') as token:
-            token.write(str(creds.to_json()))
+            token.write(creds.to_json())
         logger.info(f"Saved new credentials to {token_file}")
     
-    # Build the service
-    service = build('drive', 'v3', credentials=creds)
+    # Build the service from the bundled discovery document (no HTTPS fetch)
+    service = build(
+        'drive', 'v3', credentials=creds,
+        static_discovery=True, cache_discovery=False
+    )
     
     # Test the connection by getting the about info
     about = service.about().get(fields="user").execute()
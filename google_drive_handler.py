@@ -2,11 +2,12 @@ import os
 import io
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
+from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload, MediaIoBaseUpload
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,10 @@ class GoogleDriveHandler:
         self.folder_name = folder_name
         self.service = None
         self.root_folder_id = None
+
+        # Folder IDs are stable, so remember them instead of re-issuing a
+        # files.list round-trip on every upload
+        self._folder_cache = {}
         
         # Initialize the Google Drive API service
         self._authenticate()
@@ -70,8 +75,12 @@ class GoogleDriveHandler:
             with open(self.token_file, 'w') as token:
                 token.write(creds.to_json())
         
-        # Build the service
-        self.service = build('drive', 'v3', credentials=creds)
+        # Build the service from the bundled discovery document so startup
+        # skips the ~200 KB discovery fetch+parse entirely
+        self.service = build(
+            'drive', 'v3', credentials=creds,
+            static_discovery=True, cache_discovery=False
+        )
     
     def _get_or_create_folder(self, folder_name, parent_id=None):
         """Get or create a folder in Google Drive.
@@ -83,22 +92,31 @@ class GoogleDriveHandler:
         Returns:
             folder_id: ID of the folder
         """
+        # Served from the in-memory cache after the first lookup
+        cache_key = (folder_name, parent_id)
+        cached_id = self._folder_cache.get(cache_key)
+        if cached_id:
+            return cached_id
+
         # First, try to find an existing folder
         query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder'"
         if parent_id:
             query += f" and '{parent_id}' in parents"
         query += " and trashed=false"
         
+        # Existence check: only the ID matters and one hit is enough
         results = self.service.files().list(
             q=query,
             spaces='drive',
-            fields='files(id, name)'
+            fields='files(id)',
+            pageSize=1
         ).execute()
         
         items = results.get('files', [])
         
         # If folder exists, return its ID
         if items:
+            self._folder_cache[cache_key] = items[0]['id']
             return items[0]['id']
         
         # If folder doesn't exist, create it
@@ -114,7 +132,8 @@ class GoogleDriveHandler:
             body=folder_metadata,
             fields='id'
         ).execute()
-        
+
+        self._folder_cache[cache_key] = folder.get('id')
         return folder.get('id')
     
     def upload_file(self, file_path, folder_name=None):
@@ -142,9 +161,12 @@ class GoogleDriveHandler:
             'parents': [parent_id]
         }
         
+        # The resumable protocol costs extra round-trips (initiate/PUT/
+        # finalize), which only pays off for large payloads; small files
+        # go up in a single POST
         media = MediaFileUpload(
             file_path,
-            resumable=True
+            resumable=os.path.getsize(file_path) > 5 * 1024 * 1024
         )
         
         # Upload the file
@@ -157,6 +179,97 @@ class GoogleDriveHandler:
         logger.info(f"Uploaded file: {file_name} (ID: {file.get('id')})")
         return file.get('id')
     
+    def upload_file_data(self, file_name, file_data, mime_type='application/octet-stream', folder_name=None):
+        """Upload in-memory bytes to Google Drive without touching disk.
+
+        Replaces the previous temp-file dance (write, upload, delete);
+        an existing file with the same name is updated in place rather
+        than duplicated.
+
+        Args:
+            file_name: Name to store the file under
+            file_data: Raw bytes to upload
+            mime_type: MIME type of the payload
+            folder_name: Name of the subfolder (if None, use root folder)
+
+        Returns:
+            file_id: ID of the created or updated file
+        """
+        parent_id = self.root_folder_id
+        if folder_name:
+            parent_id = self._get_or_create_folder(folder_name, self.root_folder_id)
+
+        media = MediaIoBaseUpload(io.BytesIO(file_data), mimetype=mime_type, resumable=False)
+
+        existing = self._find_file_id(file_name, parent_id)
+        if existing:
+            self.service.files().update(
+                fileId=existing,
+                media_body=media
+            ).execute()
+            return existing
+
+        file = self.service.files().create(
+            body={'name': file_name, 'parents': [parent_id]},
+            media_body=media,
+            fields='id'
+        ).execute()
+        return file.get('id')
+
+    def _find_file_id(self, file_name, parent_id):
+        """Return the ID of a file by name within a folder, or None."""
+        query = f"name='{file_name}' and '{parent_id}' in parents and trashed=false"
+        results = self.service.files().list(
+            q=query,
+            spaces='drive',
+            fields='files(id)',
+            pageSize=1
+        ).execute()
+        items = results.get('files', [])
+        return items[0]['id'] if items else None
+
+    def download_file_data(self, file_id):
+        """Download a file's content into memory.
+
+        Args:
+            file_id: ID of the file to download
+
+        Returns:
+            bytes or None: File content, or None on failure
+        """
+        try:
+            request = self.service.files().get_media(fileId=file_id)
+            fh = io.BytesIO()
+            downloader = MediaIoBaseDownload(fh, request, chunksize=10 * 1024 * 1024)
+
+            done = False
+            while not done:
+                status, done = downloader.next_chunk()
+
+            return fh.getvalue()
+        except Exception as e:
+            logger.error(f"Error downloading file (ID: {file_id}): {str(e)}")
+            return None
+
+    def download_file_by_name(self, file_name, folder_name=None):
+        """Download a file's content into memory by name.
+
+        Args:
+            file_name: Name of the file to download
+            folder_name: Name of the subfolder (if None, use root folder)
+
+        Returns:
+            bytes or None: File content, or None if not found
+        """
+        parent_id = self.root_folder_id
+        if folder_name:
+            parent_id = self._get_or_create_folder(folder_name, self.root_folder_id)
+
+        file_id = self._find_file_id(file_name, parent_id)
+        if not file_id:
+            return None
+        return self.download_file_data(file_id)
+
     def download_file(self, file_id, output_path):
         """Download a file from Google Drive.
         
@@ -171,16 +284,16 @@ class GoogleDriveHandler:
             # Get file metadata to check if it exists
             file_metadata = self.service.files().get(fileId=file_id).execute()
             
-            # Download the file
+            # Download the file in 10 MB chunks - the default 100 KB turns
+            # a 10 MB file into ~100 range requests
             request = self.service.files().get_media(fileId=file_id)
             fh = io.FileIO(output_path, 'wb')
-            downloader = MediaIoBaseDownload(fh, request)
-            
+            downloader = MediaIoBaseDownload(fh, request, chunksize=10 * 1024 * 1024)
+
             done = False
             while not done:
                 status, done = downloader.next_chunk()
-                logger.info(f"Download {int(status.progress() * 100)}%")
-            
+
             logger.info(f"Downloaded file: {file_metadata.get('name')} to {output_path}")
             return True
             
@@ -245,25 +358,23 @@ class GoogleDriveHandler:
         # Create a user folder
         user_folder_name = f"user_{user_id}"
         user_folder_id = self._get_or_create_folder(user_folder_name, self.root_folder_id)
-        
-        # Save credentials as JSON
-        credentials = {
-            'user_id': user_id,
-            'username': username,
-            'password': password
-        }
-        
-        creds_path = f"temp_creds_{user_id}.json"
-        with open(creds_path, 'w') as f:
-            json.dump(credentials, f)
-        
-        # Upload credentials file
-        creds_file_id = self.upload_file(creds_path, user_folder_name)
-        
-        # Clean up the temporary credentials file
-        if os.path.exists(creds_path):
-            os.remove(creds_path)
-        
+
+        # Store the credentials in the file's appProperties so loading them
+        # back is a single files.list call with no content download
+        creds_file = self.service.files().create(
+            body={
+                'name': 'creds.json',
+                'parents': [user_folder_id],
+                'appProperties': {
+                    'user_id': str(user_id),
+                    'username': username,
+                    'password': password
+                }
+            },
+            fields='id'
+        ).execute()
+        creds_file_id = creds_file.get('id')
+
         result = {
             'user_folder_id': user_folder_id,
             'credentials_file_id': creds_file_id
@@ -292,39 +403,85 @@ class GoogleDriveHandler:
             fields='files(id, name)'
         ).execute()
         
-        user_folders = results.get('files', [])
-        
+        user_folders = [
+            f for f in results.get('files', []) if f['name'].startswith('user_')
+        ]
+        if not user_folders:
+            return all_credentials
+
+        # One batched files.list covering every user folder instead of a
+        # lookup per folder (the classic N+1 pattern)
+        parents_clause = " or ".join(f"'{f['id']}' in parents" for f in user_folders)
+        creds_query = f"name contains 'creds' and trashed=false and ({parents_clause})"
+        creds_results = self.service.files().list(
+            q=creds_query,
+            spaces='drive',
+            fields='files(id, name, parents, appProperties)'
+        ).execute()
+
+        # Keep the first credentials file found per folder
+        creds_by_folder = {}
+        for item in creds_results.get('files', []):
+            for parent in item.get('parents', []):
+                creds_by_folder.setdefault(parent, item)
+
+        # New-style files carry the credentials in appProperties, so the
+        # listing above already contains everything; only legacy
+        # content-based files still need a download
+        pending = []
         for folder in user_folders:
-            if folder['name'].startswith('user_'):
-                # Look for credentials file in this folder
-                creds_query = f"'{folder['id']}' in parents and name contains 'creds' and trashed=false"
-                creds_results = self.service.files().list(
-                    q=creds_query,
-                    spaces='drive',
-                    fields='files(id, name)'
-                ).execute()
-                
-                creds_files = creds_results.get('files', [])
-                
-                if creds_files:
-                    # Download and parse the first credentials file
-                    creds_file_id = creds_files[0]['id']
-                    temp_path = f"temp_download_{folder['name']}.json"
-                    
-                    if self.download_file(creds_file_id, temp_path):
-                        try:
-                            with open(temp_path, 'r') as f:
-                                credentials = json.load(f)
-                                all_credentials.append(credentials)
-                            
-                            # Clean up
-                            if os.path.exists(temp_path):
-                                os.remove(temp_path)
-                                
-                        except Exception as e:
-                            logger.error(f"Error parsing credentials file: {str(e)}")
-        
+            item = creds_by_folder.get(folder['id'])
+            if not item:
+                continue
+            credentials = self._creds_from_app_properties(item.get('appProperties'))
+            if credentials:
+                all_credentials.append(credentials)
+            else:
+                pending.append((folder, item['id']))
+
+        # Each download is a full HTTPS round-trip, so overlap them; 10
+        # workers stays well inside Drive's per-user QPS limits
+        if pending:
+            with ThreadPoolExecutor(max_workers=10) as pool:
+                for credentials in pool.map(
+                    lambda item: self._fetch_credentials_file(*item), pending
+                ):
+                    if credentials:
+                        all_credentials.append(credentials)
+
         return all_credentials
+
+    @staticmethod
+    def _creds_from_app_properties(props):
+        """Build a credentials dict from a file's appProperties, if present."""
+        if not props or 'username' not in props:
+            return None
+        try:
+            return {
+                'user_id': int(props['user_id']),
+                'username': props['username'],
+                'password': props.get('password', '')
+            }
+        except (KeyError, ValueError):
+            return None
+
+    def _fetch_credentials_file(self, folder, creds_file_id):
+        """Download and parse one folder's credentials file in memory.
+
+        Args:
+            folder: Drive folder metadata dict (id, name)
+            creds_file_id: ID of the credentials file to download
+
+        Returns:
+            dict or None: Parsed credentials if the download succeeded
+        """
+        data = self.download_file_data(creds_file_id)
+        if data:
+            try:
+                return json.loads(data)
+            except Exception as e:
+                logger.error(f"Error parsing credentials file: {str(e)}")
+        return None
     
     def load_user_credentials(self, user_id):
         """Load a specific user's Instagram credentials from Google Drive.
@@ -338,11 +495,12 @@ class GoogleDriveHandler:
         # Check if user folder exists
         user_folder_name = f"user_{user_id}"
         query = f"name='{user_folder_name}' and '{self.root_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-        
+
         results = self.service.files().list(
             q=query,
             spaces='drive',
-            fields='files(id, name)'
+            fields='files(id)',
+            pageSize=1
         ).execute()
         
         folders = results.get('files', [])
@@ -357,30 +515,26 @@ class GoogleDriveHandler:
         creds_results = self.service.files().list(
             q=creds_query,
             spaces='drive',
-            fields='files(id, name)'
+            fields='files(id, appProperties)',
+            pageSize=1
         ).execute()
-        
+
         creds_files = creds_results.get('files', [])
-        
+
         if not creds_files:
             return None
-        
-        # Download and parse the credentials file
-        creds_file_id = creds_files[0]['id']
-        temp_path = f"temp_download_{user_id}.json"
-        
-        if self.download_file(creds_file_id, temp_path):
+
+        # New-style files answer straight from metadata
+        credentials = self._creds_from_app_properties(creds_files[0].get('appProperties'))
+        if credentials:
+            return credentials
+
+        # Download and parse a legacy content-based credentials file
+        data = self.download_file_data(creds_files[0]['id'])
+        if data:
             try:
-                with open(temp_path, 'r') as f:
-                    credentials = json.load(f)
-                
-                # Clean up
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
-                
-                return credentials
-                
+                return json.loads(data)
             except Exception as e:
                 logger.error(f"Error parsing credentials file: {str(e)}")
-        
+
         return None
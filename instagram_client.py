@@ -3,24 +3,170 @@ Combined Instagram client functionality.
 This file merges mobile_instagram_client.py and robust_instagram_client.py.
 """
 import os
+import re
 import time
+import pathlib
+import asyncio
+import threading
 import random
 import json
+import codecs
 import pickle
+import hashlib
 import logging
+import logging.handlers
 import requests
+from concurrent.futures import ThreadPoolExecutor
+
+import fastjson
 from instagram_private_api import Client, ClientCompatPatch
 from instagram_private_api.errors import ClientError, ClientLoginError
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+class _RootForwardingMemoryHandler(logging.handlers.MemoryHandler):
+    """MemoryHandler that forwards to the root logger's handlers on flush.
+
+    Logging is configured in main() after this module imports, so the
+    real handlers don't exist yet at module init time; resolving them at
+    flush time also picks up every configured handler, not just one.
+    """
+
+    def flush(self):
+        self.acquire()
+        try:
+            for record in self.buffer:
+                for handler in logging.root.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            self.buffer.clear()
+        finally:
+            self.release()
+
+
+# Batch only short bursts of INFO records into one write; anything at
+# WARNING or above flushes immediately so retry/backoff progress stays
+# visible while it happens (logging.shutdown flushes whatever is left
+# at exit)
+_LOG_BUFFER = _RootForwardingMemoryHandler(capacity=8, flushLevel=logging.WARNING)
+logger.addHandler(_LOG_BUFFER)
+logger.propagate = False
+
+# Web-scrape fallback fixtures, built once at import: the _sharedData
+# pattern runs against raw response bytes (no decode pass, bounded
+# character class instead of backtracking over the whole page), and the
+# pooled session keeps the TLS connection to www.instagram.com alive
+# across shortcode fetches
+_SHARED_DATA_RE = re.compile(rb'window\._sharedData\s*=\s*({[^<]*});</script>')
+_WEB_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+_WEB_SESSION = requests.Session()
+
+# Session cache directory, created once at import instead of on every
+# client instantiation (fallback only; storage handlers bypass it)
+_SESSIONS_DIR = pathlib.Path("sessions")
+_SESSIONS_DIR.mkdir(exist_ok=True)
+
+# Small pool for session-cache I/O so a large settings file loading from
+# disk or Google Drive can overlap with login prep on the calling thread
+_IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='session-io')
+
+# Device profiles rotated across login retries; immutable, so build the
+# structure once instead of on every login call
+_DEVICE_CONFIGS = (
+    {'manufacturer': 'Samsung', 'model': 'SM-G973F', 'android_release': '10', 'android_version': 29},
+    {'manufacturer': 'Google', 'model': 'Pixel 4', 'android_release': '11', 'android_version': 30},
+    {'manufacturer': 'OnePlus', 'model': 'OnePlus8Pro', 'android_release': '11', 'android_version': 30},
+)
+
+
+def _backoff_delay(attempt, base=1.0, cap=30.0, jitter=0.5):
+    """Exponential backoff with jitter for retry attempt N (0-based).
+
+    Grows as base * 2^attempt up to cap, then spreads the result by
+    +/- jitter so concurrent clients don't retry in lockstep.
+    """
+    return min(cap, base * (2 ** attempt)) * (1 + random.uniform(-jitter, jitter))
+
+
+def _settings_to_json(obj):
+    """JSON encoder hook for session settings (bytes -> base64)."""
+    if isinstance(obj, bytes):
+        return {'__class__': 'bytes',
+                '__value__': codecs.encode(obj, 'base64').decode()}
+    raise TypeError(repr(obj))
+
+
+def _settings_from_json(d):
+    """JSON decoder hook for session settings (base64 -> bytes)."""
+    if d.get('__class__') == 'bytes':
+        return codecs.decode(d['__value__'].encode(), 'base64')
+    return d
+
+
+def _load_session_file(session_file, legacy_file):
+    """Load cached session settings from the JSON cache.
+
+    Falls back once to a legacy pickle file, rewriting it as JSON and
+    deleting the pickle so the slow/unsafe path never runs again.
+
+    Returns:
+        dict or None: Cached settings if a cache file exists
+    """
+    try:
+        with open(session_file, 'r') as f:
+            return json.load(f, object_hook=_settings_from_json)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Corrupt session cache {session_file}: {str(e)}")
+        return None
+
+    # One-time migration of an old pickle cache
+    try:
+        with open(legacy_file, 'rb') as f:
+            settings = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not migrate legacy session {legacy_file}: {str(e)}")
+        return None
+
+    _save_session_file(session_file, settings)
+    try:
+        os.remove(legacy_file)
+    except OSError:
+        pass
+    logger.info(f"Migrated legacy session cache to {session_file}")
+    return settings
+
+
+def _save_session_file(session_file, settings):
+    """Write session settings to the JSON cache."""
+    with open(session_file, 'w') as f:
+        json.dump(settings, f, default=_settings_to_json)
+
 class MobileInstagramClient:
     """
     Mobile Instagram client using the instagram_private_api.
     Handles login, session management, and content upload.
     """
-    
+
+    # In-memory session settings shared across instances, keyed by
+    # username as (timestamp, settings); skips the disk read when the
+    # scheduler logs the same account in repeatedly
+    _session_cache = {}
+    _session_cache_lock = threading.Lock()
+    _SESSION_CACHE_TTL = 3600
+
+
     def __init__(self, proxy=None, storage_handler=None):
         """
         Initialize the client.
@@ -32,153 +178,277 @@ class MobileInstagramClient:
         self.api = None
         self.is_logged_in = False
         self.username = None
+        self._canon_username = None
         self.device_id = None
         self.proxy = proxy
         self.storage_handler = storage_handler
-        
-        # Create sessions directory if it doesn't exist (fallback only)
-        os.makedirs("sessions", exist_ok=True)
-    
+
+        # Bound lazily on first shortcode fetch (depends on the API version)
+        self._shortcode_fn = None
+
     def _generate_device_id(self, username, password):
-        """Generate a device ID based on username and password."""
-        seed = f"{username}{password}{str(int(time.time()))}"
-        m = random.randint(1, 1000)
-        device_id = f"android-{m:x}{random.randint(1000, 9999):x}"
-        return device_id
+        """Generate a stable device ID derived from the credentials.
+
+        The same account always presents the same device fingerprint, which
+        keeps Instagram from treating every restart as a new device.
+        """
+        h = hashlib.sha1(f"{username}:{password}".encode()).digest()
+        return f"android-{h[:8].hex()}"
     
-    def login(self, username, password, force_login=False):
+    def _login_from_cache(self, username, password, session_file, legacy_file):
+        """Try to resume a cached session; return True on success."""
+        cached_settings = None
+
+        try:
+            logger.info(f"Attempting to use cached session for {username}")
+
+            # Check the in-memory cache before touching storage at all
+            with self._session_cache_lock:
+                cached = type(self)._session_cache.get(username)
+            if cached and time.time() - cached[0] < self._SESSION_CACHE_TTL:
+                cached_settings = cached[1]
+                logger.info(f"Loaded session from memory cache for {username}")
+
+            # Try to get session from storage handler next (Google Drive)
+            if not cached_settings and self.storage_handler:
+                cached_settings = self.storage_handler.load_instagram_session(username)
+                if cached_settings:
+                    logger.info(f"Loaded session from storage handler for {username}")
+
+            # Fallback to local file if storage handler not available or session not found
+            if not cached_settings:
+                cached_settings = _load_session_file(session_file, legacy_file)
+                if cached_settings:
+                    logger.info(f"Loaded session from local file for {username}")
+
+            if cached_settings:
+                # Create client with cached settings
+                self.api = Client(
+                    username,
+                    password,
+                    settings=cached_settings,
+                )
+
+                # Verify connectivity with a basic request
+                try:
+                    # Test connection with a lightweight API call
+                    self.api.get_client_settings()
+                    logger.info(f"Successfully logged in using cached session for {username}")
+                    with self._session_cache_lock:
+                        type(self)._session_cache[username] = (time.time(), self.api.settings)
+                    self.is_logged_in = True
+                    return True
+                except Exception as conn_error:
+                    if "temporary failure in name resolution" in str(conn_error).lower():
+                        logger.error(f"Network connectivity issue detected: {str(conn_error)}")
+                        raise Exception("network_error: Instagram servers cannot be reached. Check your internet connection and try again later.")
+                    logger.warning(f"Cached session failed verification: {str(conn_error)}")
+                    # Continue to fresh login
+        except Exception as e:
+            logger.warning(f"Failed to use cached session: {str(e)}")
+            with self._session_cache_lock:
+                type(self)._session_cache.pop(username, None)
+            try:
+                os.remove(session_file)
+            except FileNotFoundError:
+                pass
+
+        return False
+
+    def _login_from_settings(self, username, password, settings):
+        """Try to resume from caller-provided settings; return True on success."""
+        try:
+            logger.info(f"Attempting to resume session for {username}")
+            self.api = Client(
+                username,
+                password,
+                settings=settings,
+            )
+            self.api.get_client_settings()
+            logger.info(f"Successfully resumed session for {username}")
+            with self._session_cache_lock:
+                type(self)._session_cache[username] = (time.time(), self.api.settings)
+            self.is_logged_in = True
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to resume provided session: {str(e)}")
+            return False
+
+    def _login_attempt(self, username, password, device_config, session_file):
+        """Run one fresh login attempt; return True on success."""
+        # Create a new client and login
+        self.api = Client(
+            username,
+            password,
+            device_id=self.device_id,
+            **device_config
+        )
+
+        # Check if login was successful by retrieving user info
+        user_info = self.api.username_info(username)
+        if user_info and 'user' in user_info:
+            logger.info(f"Successfully logged in as {username}")
+
+            # Cache the session settings
+            if self.storage_handler:
+                # Save to Google Drive via storage handler
+                self.storage_handler.save_instagram_session(username, self.api.settings)
+                logger.info(f"Saved session to storage handler for {username}")
+            else:
+                # Fallback to local file if storage handler not available
+                _save_session_file(session_file, self.api.settings)
+                logger.info(f"Saved session to local file for {username}")
+
+            with self._session_cache_lock:
+                type(self)._session_cache[username] = (time.time(), self.api.settings)
+
+            self.is_logged_in = True
+            return True
+
+        return False
+
+    def _raise_if_unrecoverable(self, error):
+        """Re-raise login errors that retrying can never fix."""
+        error_msg = str(error).lower()
+
+        if "challenge_required" in error_msg:
+            logger.error("Instagram security challenge required. Manual verification needed.")
+            raise error
+        elif "bad_password" in error_msg:
+            logger.error("Incorrect password provided.")
+            raise error
+        elif "invalid_user" in error_msg:
+            logger.error("Invalid username. The account may not exist or may have been deactivated.")
+            raise Exception("invalid_user")
+
+    def login(self, username, password=None, force_login=False, settings=None):
         """
         Login to Instagram using the mobile API with session caching.
+
+        A caller-provided settings dict (from a previous login) or the
+        cached session lets us resume without a password; a fresh
+        password login only happens when neither works.
         """
         self.username = username
-        session_file = f"sessions/{username.lower()}_mobile.pkl"
-        
-        # Try to reuse cached session if it exists and we're not forcing login
-        cached_settings = None
-        
+        # Canonical lowercase form, computed once per login and reused by
+        # the session-file and storage-handler paths
+        self._canon_username = username.lower()
+        # Drop any method bound to a previous api instance
+        self._shortcode_fn = None
+        session_file = f"sessions/{self._canon_username}_mobile.json"
+        legacy_file = f"sessions/{self._canon_username}_mobile.pkl"
+
+        # Try to resume from caller-provided session settings first
+        if not force_login and settings and self._login_from_settings(username, password, settings):
+            return True
+
+        # Kick off the cached-session resume on the I/O pool so the
+        # settings file load overlaps with the login prep below
+        resume = None
         if not force_login:
-            try:
-                logger.info(f"Attempting to use cached session for {username}")
-                
-                # Try to get session from storage handler first (Google Drive)
-                if self.storage_handler:
-                    cached_settings = self.storage_handler.load_instagram_session(username)
-                    if cached_settings:
-                        logger.info(f"Loaded session from storage handler for {username}")
-                
-                # Fallback to local file if storage handler not available or session not found
-                if not cached_settings and os.path.exists(session_file):
-                    with open(session_file, "rb") as f:
-                        cached_settings = pickle.load(f)
-                    logger.info(f"Loaded session from local file for {username}")
-                
-                if cached_settings:
-                    # Create client with cached settings
-                    self.api = Client(
-                        username,
-                        password,
-                        settings=cached_settings,
-                    )
-                    
-                    # Verify connectivity with a basic request
-                    try:
-                        # Test connection with a lightweight API call
-                        self.api.get_client_settings()
-                        logger.info(f"Successfully logged in using cached session for {username}")
-                        self.is_logged_in = True
-                        return True
-                    except Exception as conn_error:
-                        if "temporary failure in name resolution" in str(conn_error).lower():
-                            logger.error(f"Network connectivity issue detected: {str(conn_error)}")
-                            raise Exception("network_error: Instagram servers cannot be reached. Check your internet connection and try again later.")
-                        logger.warning(f"Cached session failed verification: {str(conn_error)}")
-                        # Continue to fresh login
-            except Exception as e:
-                logger.warning(f"Failed to use cached session: {str(e)}")
-                if os.path.exists(session_file):
-                    os.remove(session_file)
-        
+            resume = _IO_POOL.submit(
+                self._login_from_cache, username, password, session_file, legacy_file)
+
+        # A fresh login needs the password; sessions restored from storage
+        # deliberately don't keep one in memory
+        if not password:
+            if resume is not None and resume.result():
+                return True
+            raise Exception("login_required: cached session expired, please log in again")
+
         # Generate a device ID if we don't have one
         if not self.device_id:
             self.device_id = self._generate_device_id(username, password)
-        
-        # Try to login with multiple retries
+
+        if resume is not None and resume.result():
+            return True
+
+        return self._login_fresh(username, password, session_file)
+
+    def _login_fresh(self, username, password, session_file):
+        """Run the fresh-login retry loop: up to five attempts, rotating
+        device profiles, with jittered exponential backoff between them.
+
+        Blocking (time.sleep between attempts); async callers run it in
+        an executor.
+        """
         max_retries = 5
-        device_configs = [
-            {'manufacturer': 'Samsung', 'model': 'SM-G973F', 'android_release': '10', 'android_version': 29},
-            {'manufacturer': 'Google', 'model': 'Pixel 4', 'android_release': '11', 'android_version': 30},
-            {'manufacturer': 'OnePlus', 'model': 'OnePlus8Pro', 'android_release': '11', 'android_version': 30}
-        ]
-        
+
         for attempt in range(1, max_retries + 1):
             # Pick a device configuration based on attempt number
-            device_config = device_configs[(attempt - 1) % len(device_configs)]
-            
+            device_config = _DEVICE_CONFIGS[(attempt - 1) % len(_DEVICE_CONFIGS)]
+
             try:
                 logger.info(f"Login attempt {attempt}/{max_retries} for {username} with device: {device_config['manufacturer']} {device_config['model']}")
-                
-                # Create a new client and login
-                self.api = Client(
-                    username,
-                    password,
-                    device_id=self.device_id,
-                    **device_config
-                )
-                
-                # Check if login was successful by retrieving user info
-                user_info = self.api.username_info(username)
-                if user_info and 'user' in user_info:
-                    logger.info(f"Successfully logged in as {username}")
-                    
-                    # Cache the session settings
-                    if self.storage_handler:
-                        # Save to Google Drive via storage handler
-                        self.storage_handler.save_instagram_session(username, self.api.settings)
-                        logger.info(f"Saved session to storage handler for {username}")
-                    else:
-                        # Fallback to local file if storage handler not available
-                        with open(session_file, "wb") as f:
-                            pickle.dump(self.api.settings, f)
-                        logger.info(f"Saved session to local file for {username}")
-                    
-                    self.is_logged_in = True
+
+                if self._login_attempt(username, password, device_config, session_file):
                     return True
-            
+
             except ClientLoginError as e:
                 logger.error(f"Login error: {str(e)}")
-                error_msg = str(e).lower()
-                
-                # Check for known error types
-                if "challenge_required" in error_msg:
-                    logger.error("Instagram security challenge required. Manual verification needed.")
-                    raise
-                elif "bad_password" in error_msg:
-                    logger.error("Incorrect password provided.")
-                    raise
-                elif "invalid_user" in error_msg:
-                    logger.error("Invalid username. The account may not exist or may have been deactivated.")
-                    raise Exception("invalid_user")
-                
+                self._raise_if_unrecoverable(e)
+
                 # For other errors, retry with delay if we have attempts left
                 if attempt < max_retries:
-                    sleep_time = 5 + random.uniform(1, 5)
+                    sleep_time = _backoff_delay(attempt - 1)
                     logger.info(f"Retrying in {sleep_time:.2f} seconds...")
                     time.sleep(sleep_time)
                 else:
                     logger.error(f"Failed to login after {max_retries} attempts")
                     raise
-            
+
             except Exception as e:
                 logger.error(f"Unexpected error during login: {str(e)}")
                 if attempt < max_retries:
-                    sleep_time = 5 + random.uniform(1, 5)
+                    sleep_time = _backoff_delay(attempt - 1)
                     logger.info(f"Retrying in {sleep_time:.2f} seconds...")
                     time.sleep(sleep_time)
                 else:
                     logger.error(f"Failed to login after {max_retries} attempts")
                     raise
-        
+
         return False
+
+    async def login_async(self, username, password=None, force_login=False, settings=None):
+        """
+        Async variant of login for callers managing several accounts.
+
+        The blocking Client calls - retry loop and backoff sleeps
+        included - run in the default executor, so the event loop can
+        interleave logins across accounts instead of serializing them.
+        """
+        loop = asyncio.get_event_loop()
+
+        self.username = username
+        # Canonical lowercase form, computed once per login and reused by
+        # the session-file and storage-handler paths
+        self._canon_username = username.lower()
+        # Drop any method bound to a previous api instance
+        self._shortcode_fn = None
+        session_file = f"sessions/{self._canon_username}_mobile.json"
+        legacy_file = f"sessions/{self._canon_username}_mobile.pkl"
+
+        # Try to resume from caller-provided session settings first
+        if not force_login and settings and await loop.run_in_executor(
+                None, self._login_from_settings, username, password, settings):
+            return True
+
+        # Try to reuse cached session if it exists and we're not forcing login
+        if not force_login and await loop.run_in_executor(
+                None, self._login_from_cache, username, password, session_file, legacy_file):
+            return True
+
+        # A fresh login needs the password; sessions restored from storage
+        # deliberately don't keep one in memory
+        if not password:
+            raise Exception("login_required: cached session expired, please log in again")
+
+        # Generate a device ID if we don't have one
+        if not self.device_id:
+            self.device_id = self._generate_device_id(username, password)
+
+        return await loop.run_in_executor(
+            None, self._login_fresh, username, password, session_file)
     
     def upload_photo(self, photo_path, caption="", options=None):
         """
@@ -218,7 +488,58 @@ class MobileInstagramClient:
         except Exception as e:
             logger.error(f"Failed to upload photo: {str(e)}")
             raise
-    
+
+    def upload_video(self, video_path, thumbnail_path, caption="", location=None):
+        """
+        Upload a video to Instagram.
+
+        Args:
+            video_path (str): Path to the video file.
+            thumbnail_path (str): Path to the thumbnail image.
+            caption (str, optional): Caption for the video.
+            location (dict, optional): Location tag for the post.
+
+        Returns:
+            dict: media_id/media_code/status of the uploaded video.
+        """
+        if not self.is_logged_in or not self.api:
+            raise Exception("You must be logged in to upload videos")
+
+        try:
+            logger.info(f"Uploading video: {video_path}")
+
+            # Add some randomized delays to mimic human behavior
+            time.sleep(random.uniform(2, 5))
+
+            # Upload the video
+            result = self.api.post_video(
+                video_path,
+                thumbnail_path,
+                caption=caption,
+                location=location
+            )
+
+            # Extract media ID and code from result
+            media_id = result.get('media', {}).get('id')
+            media_code = result.get('media', {}).get('code')
+
+            logger.info(f"Successfully uploaded video. Media ID: {media_id}, Code: {media_code}")
+            return {
+                'media_id': media_id,
+                'media_code': media_code,
+                'status': 'success'
+            }
+
+        except Exception as e:
+            logger.error(f"Error uploading video: {str(e)}")
+            raise
+
+    def get_settings(self):
+        """
+        Return the current API session settings, or None if not logged in.
+        """
+        return self.api.settings if self.api else None
+
     def get_media_by_shortcode(self, shortcode):
         """
         Get media information using a shortcode.
@@ -235,73 +556,82 @@ class MobileInstagramClient:
             raise Exception("You must be logged in to get media information")
         
         try:
-            # Some versions of the API have a direct media_info_by_code method
-            try:
-                return self.api.media_info_by_code(shortcode)
-            except AttributeError:
-                # Fall back to documented method
-                pass
-            
-            # Use the documented endpoint
-            try:
-                # Try to use the direct media info endpoint
-                return self.api.media_info2(shortcode)
-            except (AttributeError, Exception) as e:
-                logger.debug(f"Error with media_info2: {e}")
-            
-            # Try to fetch user feed and search for the post
-            # First get the information directly using Instagram's web API
-            import requests
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            url = f'https://www.instagram.com/p/{shortcode}/'
-            
-            try:
-                resp = requests.get(url, headers=headers)
-                
-                # Search for JSON data in the response
-                import re
-                import json
-                json_data = re.search(r'<script[^>]*>window\._sharedData\s*=\s*(.*?);</script>', resp.text)
-                if json_data:
-                    data = json.loads(json_data.group(1))
-                    media_data = data.get('entry_data', {}).get('PostPage', [{}])[0].get('graphql', {}).get('shortcode_media', {})
-                    
-                    if media_data:
-                        # Convert to format similar to API response
-                        return {
-                            'items': [{
-                                'id': media_data.get('id'),
-                                'media_type': 1 if media_data.get('__typename') == 'GraphImage' else 2,
-                                'image_versions2': {
-                                    'candidates': [{'url': media_data.get('display_url')}]
-                                },
-                                'video_versions': [{'url': media_data.get('video_url')}] if media_data.get('is_video') else [],
-                                'user': {
-                                    'username': media_data.get('owner', {}).get('username'),
-                                    'full_name': media_data.get('owner', {}).get('full_name'),
-                                },
-                                'caption': {'text': media_data.get('edge_media_to_caption', {}).get('edges', [{}])[0].get('node', {}).get('text', '')},
-                                'like_count': media_data.get('edge_media_preview_like', {}).get('count', 0),
-                                'comment_count': media_data.get('edge_media_to_comment', {}).get('count', 0),
-                                'taken_at': media_data.get('taken_at_timestamp', 0)
-                            }]
-                        }
-            except Exception as web_error:
-                logger.error(f"Error fetching media from web API: {web_error}")
-            
+            # Bind the best available API endpoint once instead of paying
+            # an AttributeError raise/catch on every call with older API
+            # versions that lack media_info_by_code
+            fn = self._shortcode_fn
+            if fn is None:
+                for name in ('media_info_by_code', 'media_info2'):
+                    fn = getattr(self.api, name, None)
+                    if fn is not None:
+                        break
+                else:
+                    fn = self._web_scrape_shortcode
+                self._shortcode_fn = fn
+
+            if fn is not self._web_scrape_shortcode:
+                try:
+                    return fn(shortcode)
+                except Exception as e:
+                    logger.debug(f"Error with {fn.__name__}: {e}")
+
+                result = self._web_scrape_shortcode(shortcode)
+                if result:
+                    return result
+            else:
+                result = fn(shortcode)
+                if result:
+                    return result
+
             # Try one more approach - this is a fallback that might work with some API versions
             endpoint = f'media/{shortcode}/info/'
             return self.api._call_api(endpoint)
-        
+
         except Exception as e:
             logger.error(f"Error in get_media_by_shortcode: {str(e)}")
             raise
+
+    def _web_scrape_shortcode(self, shortcode):
+        """Fetch media info from Instagram's web page for a shortcode.
+
+        Returns:
+            dict or None: API-shaped media information if the page parsed
+        """
+        url = f'https://www.instagram.com/p/{shortcode}/'
+
+        try:
+            resp = _WEB_SESSION.get(url, headers=_WEB_HEADERS)
+
+            # Search for JSON data in the raw response bytes
+            json_data = _SHARED_DATA_RE.search(resp.content)
+            if json_data:
+                data = fastjson.loads(json_data.group(1))
+                media_data = data.get('entry_data', {}).get('PostPage', [{}])[0].get('graphql', {}).get('shortcode_media', {})
+
+                if media_data:
+                    # Convert to format similar to API response
+                    return {
+                        'items': [{
+                            'id': media_data.get('id'),
+                            'media_type': 1 if media_data.get('__typename') == 'GraphImage' else 2,
+                            'image_versions2': {
+                                'candidates': [{'url': media_data.get('display_url')}]
+                            },
+                            'video_versions': [{'url': media_data.get('video_url')}] if media_data.get('is_video') else [],
+                            'user': {
+                                'username': media_data.get('owner', {}).get('username'),
+                                'full_name': media_data.get('owner', {}).get('full_name'),
+                            },
+                            'caption': {'text': media_data.get('edge_media_to_caption', {}).get('edges', [{}])[0].get('node', {}).get('text', '')},
+                            'like_count': media_data.get('edge_media_preview_like', {}).get('count', 0),
+                            'comment_count': media_data.get('edge_media_to_comment', {}).get('count', 0),
+                            'taken_at': media_data.get('taken_at_timestamp', 0)
+                        }]
+                    }
+        except Exception as web_error:
+            logger.error(f"Error fetching media from web API: {web_error}")
+
+        return None
     
     def logout(self):
         """Logout from Instagram."""
@@ -1,5 +1,9 @@
 import os
+import asyncio
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any
 
 class InstagramGraphAPI:
@@ -8,36 +12,70 @@ class InstagramGraphAPI:
         self.instagram_account_id = instagram_account_id
         self.api_version = 'v18.0'
         self.base_url = f'https://graph.facebook.com/{self.api_version}'
-    
+
+        # Endpoint URLs never change for a given account; build them once
+        self._media_url = f'{self.base_url}/{self.instagram_account_id}/media'
+        self._publish_url = f'{self.base_url}/{self.instagram_account_id}/media_publish'
+
+        # One keep-alive session for the create/publish pair: saves a TLS
+        # handshake per call and retries 429/5xx with exponential backoff.
+        # The token rides in an Authorization header instead of being
+        # re-encoded into every query string.
+        self._session = requests.Session()
+        self._session.mount('https://', HTTPAdapter(max_retries=Retry(
+            total=3,
+            backoff_factor=1.0,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods={'POST'}
+        )))
+        self._session.headers['Authorization'] = f'Bearer {access_token}'
+
+        # aiohttp session for the async pipeline, created lazily so the
+        # constructor stays usable outside an event loop
+        self._aio_session: Optional[aiohttp.ClientSession] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared aiohttp session, creating it on first use."""
+        if self._aio_session is None or self._aio_session.closed:
+            self._aio_session = aiohttp.ClientSession(
+                headers={'Authorization': f'Bearer {self.access_token}'},
+                timeout=aiohttp.ClientTimeout(connect=5, total=35)
+            )
+        return self._aio_session
+
+    async def _post_async(self, url: str, params: Dict[str, str]) -> Dict[str, Any]:
+        session = await self._get_session()
+        async with session.post(url, data=params) as response:
+            return await response.json()
+
+    async def close(self):
+        """Close the aiohttp session if one was created."""
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+
     def create_container(self, image_url: str, caption: str) -> Optional[str]:
         """Create a media container for the image."""
-        url = f'{self.base_url}/{self.instagram_account_id}/media'
-        
         params = {
             'image_url': image_url,
-            'caption': caption,
-            'access_token': self.access_token
+            'caption': caption
         }
-        
-        response = requests.post(url, params=params)
+
+        response = self._session.post(self._media_url, params=params, timeout=(5, 30))
         data = response.json()
-        
+
         if 'id' in data:
             return data['id']
         elif 'error' in data:
             raise Exception(f"Failed to create container: {data['error']['message']}")
         return None
-    
+
     def publish_container(self, creation_id: str) -> Optional[str]:
         """Publish a media container."""
-        url = f'{self.base_url}/{self.instagram_account_id}/media_publish'
-        
         params = {
-            'creation_id': creation_id,
-            'access_token': self.access_token
+            'creation_id': creation_id
         }
-        
-        response = requests.post(url, params=params)
+
+        response = self._session.post(self._publish_url, params=params, timeout=(5, 30))
         data = response.json()
         
         if 'id' in data:
@@ -46,25 +84,71 @@ class InstagramGraphAPI:
             raise Exception(f"Failed to publish: {data['error']['message']}")
         return None
     
+    async def post_to_instagram_async(self, image_url: str, caption: str) -> Dict[str, Any]:
+        """Post content to Instagram using the Graph API without blocking.
+
+        Uses the shared aiohttp session so a caller batch-scheduling posts
+        can run several of these concurrently over one connection pool.
+        """
+        try:
+            # Step 1: Create a media container
+            data = await self._post_async(self._media_url, {
+                'image_url': image_url,
+                'caption': caption
+            })
+            if 'error' in data:
+                raise Exception(f"Failed to create container: {data['error']['message']}")
+            creation_id = data.get('id')
+            if not creation_id:
+                raise Exception("Failed to create media container")
+
+            # Step 2: Publish the container
+            data = await self._post_async(self._publish_url, {
+                'creation_id': creation_id
+            })
+            if 'error' in data:
+                raise Exception(f"Failed to publish: {data['error']['message']}")
+            media_id = data.get('id')
+            if not media_id:
+                raise Exception("Failed to publish media")
+
+            return {
+                "success": True,
+                "media_id": media_id,
+                "post_url": f"https://www.instagram.com/p/{media_id}"
+            }
+
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+
     def post_to_instagram(self, image_url: str, caption: str) -> Dict[str, Any]:
-        """Post content to Instagram using the Graph API."""
+        """Post content to Instagram using the Graph API.
+
+        Blocking path over the retrying requests session; the aiohttp
+        pipeline is reserved for async callers because its session is
+        bound to one event loop and asyncio.run would tear that loop
+        down after the first call.
+        """
         try:
             # Step 1: Create a media container
             creation_id = self.create_container(image_url, caption)
             if not creation_id:
                 raise Exception("Failed to create media container")
-            
+
             # Step 2: Publish the container
             media_id = self.publish_container(creation_id)
             if not media_id:
                 raise Exception("Failed to publish media")
-            
+
             return {
                 "success": True,
                 "media_id": media_id,
                 "post_url": f"https://www.instagram.com/p/{media_id}"
             }
-            
+
         except Exception as e:
             return {
                 "success": False,
@@ -1,59 +1,176 @@
 import os
+import re
+import atexit
+import asyncio
 import tempfile
 from typing import Dict, List, Any, Optional
+from aiolimiter import AsyncLimiter
 from instagrapi import Client
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urlparse
 import shutil
+from dataclasses import dataclass
+
+# Pulls the shortcode out of post/reel/tv URLs in one pass, query strings
+# and trailing slashes included
+_SHORTCODE_RE = re.compile(r'instagram\.com/(?:p|reel|tv)/([A-Za-z0-9_-]+)')
+
+# Exact-host allowlist: a hash probe instead of a substring scan, and it
+# rejects lookalike domains that merely contain 'instagram.com'
+_ALLOWED_HOSTS = frozenset({'instagram.com', 'www.instagram.com', 'm.instagram.com'})
+
+
+@dataclass(slots=True)
+class MediaFile:
+    """One downloaded media entry; slotted, so a big carousel doesn't
+    allocate a dict per file."""
+    type: str
+    path: str
+    url: Any
 
 class InstagramHandler:
     def __init__(self):
-        self.client = None
+        # Build the client eagerly so its sessions (and eventually TLS
+        # pools) warm up once for the process lifetime
+        self.client = Client()
+        self._configure_sessions(self.client)
+        self._authenticated = False
         self.temp_dir = tempfile.mkdtemp()
-        
-    def download_instagram_post(self, post_url: str, instagram_username: Optional[str] = None, instagram_password: Optional[str] = None) -> Dict[str, Any]:
-        """Download an Instagram post and return its metadata."""
+
+        # shortcode -> media_pk; the mapping never changes, so retries and
+        # repeat downloads skip the lookup round trip against Instagram
+        self._pk_cache: Dict[str, int] = {}
+
+        # Bound AND pace album fan-out: at most four downloads in flight,
+        # token-bucketed to a 4-per-4s burst (~1/sec sustained) so the
+        # parallelism doesn't turn into 429s or an account flag
+        self._download_sem = asyncio.Semaphore(4)
+        self._download_limiter = AsyncLimiter(4, 4)
+
+        # Temp files and the Instagram session live as long as the process
+        atexit.register(self.cleanup)
+
+    @staticmethod
+    def _configure_sessions(client):
+        """Mount pooled, retrying adapters on the client's HTTP sessions.
+
+        instagrapi keeps separate requests sessions for the private API
+        and the public/CDN endpoints; give both a connection pool sized
+        for parallel album downloads and retries on 429/5xx, so repeated
+        media fetches reuse warm TLS connections.
+        """
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        for session in (client.private, client.public):
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+    def _login(self, username: str, password: str):
+        """Authenticate the client, reusing a persisted session when valid.
+
+        A full login is a multi-request flow that Instagram rate-limits
+        aggressively, so try settings persisted from a previous run first
+        and only fall back to a fresh login when they fail validation.
+        """
+        session_path = os.path.join("sessions", f"{username}_instagrapi.json")
+        try:
+            self.client.load_settings(session_path)
+            self.client.get_timeline_feed()
+            return
+        except Exception:
+            pass
+
+        self.client.login(username, password)
+        try:
+            os.makedirs("sessions", exist_ok=True)
+            self.client.dump_settings(session_path)
+        except Exception:
+            pass  # Session reuse is an optimization; login already succeeded
+
+    async def login(self, username: str, password: str) -> bool:
+        """Authenticate the download client off the event loop.
+
+        Bot handlers call this when a user logs in, so auth-required
+        posts can be fetched later without the password being kept
+        around; _login reuses a persisted session when one is valid.
+        """
+        await asyncio.to_thread(self._login, username, password)
+        self._authenticated = True
+        return True
+
+    @staticmethod
+    def _cached_file(path):
+        """Return True if the media file is already on disk and non-empty."""
+        try:
+            return os.path.getsize(path) > 0
+        except OSError:
+            return False
+
+    def _stream_download(self, url, file_path):
+        """Stream a media URL to disk with a bounded buffer.
+
+        instagrapi's download helpers buffer the whole file in memory
+        before writing; for a long reel that is the full file size in
+        RSS per concurrent download. Copying from the raw socket with a
+        1 MiB buffer keeps the working set constant.
+        """
+        with self.client.public.get(str(url), stream=True, timeout=30) as resp:
+            resp.raise_for_status()
+            with open(file_path, 'wb') as f:
+                shutil.copyfileobj(resp.raw, f, length=1024 * 1024)
+        return file_path
+
+    async def download_instagram_post(self, post_url: str, instagram_username: Optional[str] = None, instagram_password: Optional[str] = None) -> Dict[str, Any]:
+        """Download an Instagram post and return its metadata.
+
+        The instagrapi calls are blocking, so they run in worker threads;
+        album resources download concurrently via asyncio.gather while the
+        event loop stays free for other updates.
+        """
         try:
             # Validate URL format
-            if 'instagram.com' not in post_url:
+            host = urlparse(post_url).hostname or ''
+            if host not in _ALLOWED_HOSTS:
                 raise ValueError("Invalid Instagram URL. Please provide a valid Instagram post URL.")
             
-            # Clean up the URL - remove query parameters
-            clean_url = post_url.split('?')[0].rstrip('/')
-            
-            # Extract media ID from URL
-            parts = clean_url.split('/')
-            media_pk = None
-            
-            # Find the shortcode after 'p' or 'reel'
-            shortcode = None
-            for i, part in enumerate(parts):
-                if part in ['p', 'reel'] and i + 1 < len(parts):
-                    shortcode = parts[i + 1]
-                    break
-            
-            if not shortcode:
+            # Extract the shortcode from the URL
+            match = _SHORTCODE_RE.search(post_url)
+            if not match:
                 raise ValueError(
                     "Could not find post ID in the URL. \n"
                     "The URL should be in one of these formats:\n"
                     "- instagram.com/p/POSTID\n"
                     "- instagram.com/reel/POSTID"
                 )
+            shortcode = match.group(1)
             
-            # Initialize client and login if needed
-            if not self.client:
-                self.client = Client()
-                if instagram_username and instagram_password:
-                    try:
-                        self.client.login(instagram_username, instagram_password)
-                    except Exception as e:
-                        raise Exception(f"Login failed: {str(e)}")
+            # Login on first authenticated use
+            if instagram_username and instagram_password and not self._authenticated:
+                try:
+                    await asyncio.to_thread(
+                        self._login, instagram_username, instagram_password)
+                    self._authenticated = True
+                except Exception as e:
+                    raise Exception(f"Login failed: {str(e)}")
             
             try:
-                # Get media ID from shortcode
-                media_pk = self.client.media_pk_from_code(shortcode)
-                
+                # Get media ID from shortcode (cached across calls)
+                media_pk = self._pk_cache.get(shortcode)
+                if media_pk is None:
+                    media_pk = await asyncio.to_thread(
+                        self.client.media_pk_from_code, shortcode)
+                    self._pk_cache[shortcode] = media_pk
+
                 # Get media info
-                media_info = self.client.media_info(media_pk)
+                media_info = await asyncio.to_thread(self.client.media_info, media_pk)
                 
                 # Create a unique directory for this post inside temp_dir
                 target_dir = os.path.join(self.temp_dir, f"{media_info.user.username}_{shortcode}")
@@ -64,62 +181,65 @@ class InstagramHandler:
                 # Handle different media types
                 if media_info.media_type == 1:  # Photo
                     file_path = os.path.join(target_dir, f"{shortcode}.jpg")
-                    # Download to the directory, not directly to the file path
-                    downloaded_path = self.client.photo_download(media_pk, target_dir)
-                    # Convert PosixPath to string if needed
-                    downloaded_path = str(downloaded_path) if downloaded_path else None
-                    # If downloaded path exists, use it, otherwise use our created path
-                    if downloaded_path and os.path.exists(downloaded_path):
-                        file_path = downloaded_path
-                    media_files.append({
-                        'type': 'photo',
-                        'path': file_path,
-                        'url': media_info.thumbnail_url
-                    })
+                    if not self._cached_file(file_path):
+                        downloaded_path = await asyncio.to_thread(
+                            self.client.photo_download, media_pk, target_dir)
+                        # Normalize to the deterministic name so repeat
+                        # calls for this shortcode become a cache hit
+                        if downloaded_path and str(downloaded_path) != file_path:
+                            os.replace(str(downloaded_path), file_path)
+                    media_files.append(MediaFile(
+                        type='photo',
+                        path=file_path,
+                        url=media_info.thumbnail_url
+                    ))
                 elif media_info.media_type == 2:  # Video
                     file_path = os.path.join(target_dir, f"{shortcode}.mp4")
-                    # Download to the directory, not directly to the file path
-                    downloaded_path = self.client.video_download(media_pk, target_dir)
-                    # Convert PosixPath to string if needed
-                    downloaded_path = str(downloaded_path) if downloaded_path else None
-                    # If downloaded path exists, use it, otherwise use our created path
-                    if downloaded_path and os.path.exists(downloaded_path):
-                        file_path = downloaded_path
-                    media_files.append({
-                        'type': 'video',
-                        'path': file_path,
-                        'url': media_info.video_url
-                    })
+                    if not self._cached_file(file_path):
+                        # Stream straight from the CDN to disk
+                        await asyncio.to_thread(
+                            self._stream_download, media_info.video_url, file_path)
+                    media_files.append(MediaFile(
+                        type='video',
+                        path=file_path,
+                        url=media_info.video_url
+                    ))
                 elif media_info.media_type == 8:  # Album
-                    for i, resource in enumerate(media_info.resources):
+                    # Album items are independent CDN fetches; download
+                    # them concurrently instead of paying one round trip
+                    # after another
+                    def _download_resource(i, resource):
                         if resource.media_type == 1:  # Photo in album
                             file_path = os.path.join(target_dir, f"{shortcode}_{i}.jpg")
-                            # Download to the directory, not directly to the file path
-                            downloaded_path = self.client.photo_download(resource.pk, target_dir)
-                            # Convert PosixPath to string if needed
-                            downloaded_path = str(downloaded_path) if downloaded_path else None
-                            # If downloaded path exists, use it, otherwise use our created path
-                            if downloaded_path and os.path.exists(downloaded_path):
-                                file_path = downloaded_path
-                            media_files.append({
-                                'type': 'photo',
-                                'path': file_path,
-                                'url': resource.thumbnail_url
-                            })
-                        elif resource.media_type == 2:  # Video in album
+                            if not self._cached_file(file_path):
+                                downloaded_path = self.client.photo_download(resource.pk, target_dir)
+                                # Normalize to the deterministic name so
+                                # repeat calls become a cache hit
+                                if downloaded_path and str(downloaded_path) != file_path:
+                                    os.replace(str(downloaded_path), file_path)
+                        else:  # Video in album
                             file_path = os.path.join(target_dir, f"{shortcode}_{i}.mp4")
-                            # Download to the directory, not directly to the file path
-                            downloaded_path = self.client.video_download(resource.pk, target_dir)
-                            # Convert PosixPath to string if needed
-                            downloaded_path = str(downloaded_path) if downloaded_path else None
-                            # If downloaded path exists, use it, otherwise use our created path
-                            if downloaded_path and os.path.exists(downloaded_path):
-                                file_path = downloaded_path
-                            media_files.append({
-                                'type': 'video',
-                                'path': file_path,
-                                'url': resource.video_url
-                            })
+                            if not self._cached_file(file_path):
+                                # Stream straight from the CDN to disk
+                                self._stream_download(resource.video_url, file_path)
+                        return MediaFile(
+                            type='photo' if resource.media_type == 1 else 'video',
+                            path=file_path,
+                            url=resource.thumbnail_url if resource.media_type == 1 else resource.video_url
+                        )
+
+                    async def _bounded_download(i, resource):
+                        async with self._download_sem:
+                            async with self._download_limiter:
+                                return await asyncio.to_thread(_download_resource, i, resource)
+
+                    resources = [(i, r) for i, r in enumerate(media_info.resources)
+                                 if r.media_type in (1, 2)]
+                    if resources:
+                        # gather preserves task order, so the album order
+                        # survives the fan-out
+                        media_files.extend(await asyncio.gather(*(
+                            _bounded_download(i, r) for i, r in resources)))
                 
                 return {
                     "username": media_info.user.username,
@@ -149,9 +269,22 @@ class InstagramHandler:
     def cleanup(self):
         """Clean up temporary files and logout."""
         try:
-            if self.client:
+            if self.client and self._authenticated:
                 self.client.logout()
             if os.path.exists(self.temp_dir):
                 shutil.rmtree(self.temp_dir)
         except:
             pass  # Best effort cleanup
+
+
+# Shared handler so a long-lived bot process reuses one Client (and its
+# warm connection pool, login session and pk cache) across requests
+_handler: Optional[InstagramHandler] = None
+
+
+def get_handler() -> InstagramHandler:
+    """Return the process-wide InstagramHandler, creating it lazily."""
+    global _handler
+    if _handler is None:
+        _handler = InstagramHandler()
+    return _handler
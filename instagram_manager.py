@@ -34,6 +34,9 @@ class InstagramManager:
         self.is_logged_in = False
         self.username = None
         self.post_data = {}
+        # One pooled HTTP session for all media downloads; keep-alive saves
+        # a TCP+TLS handshake per file against Instagram's CDN
+        self.http = requests.Session()
     
     def login(self, username, password, force_login=False):
         """
@@ -133,7 +136,7 @@ class InstagramManager:
             }
             
             url = f"https://www.instagram.com/p/{shortcode}/"
-            response = requests.get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
             
             if response.status_code == 200:
                 # Try to find shared data in the HTML
@@ -240,8 +243,9 @@ class InstagramManager:
             logger.error(f"Error extracting shortcode: {e}")
             raise ValueError(f"Could not extract shortcode from URL: {post_url}")
         
-        # Check login status and login if credentials provided
-        if not self.is_logged_in and instagram_username and instagram_password:
+        # Check login status and login if a username is known; the client
+        # resumes from its cached session when no password is provided
+        if not self.is_logged_in and instagram_username:
             self.login(instagram_username, instagram_password)
         
         # If we're still not logged in, raise an error
@@ -383,16 +387,18 @@ class InstagramManager:
             logger.error(f"Error reposting to Instagram: {str(e)}")
             raise
     
-    def direct_repost(self, post_url: str, new_caption: str, instagram_username: str, instagram_password: str) -> Dict[str, Any]:
+    def direct_repost(self, post_url: str, new_caption: str, instagram_username: str,
+                      instagram_password: Optional[str] = None) -> Dict[str, Any]:
         """
         Directly repost an Instagram post without exposing download steps to the user.
-        
+
         Args:
             post_url (str): URL of the Instagram post to repost
             new_caption (str): New caption for the repost
             instagram_username (str): Instagram username
-            instagram_password (str): Instagram password
-            
+            instagram_password (str, optional): Instagram password; the client
+                resumes from its cached session when omitted
+
         Returns:
             dict: Result information
         """
@@ -541,7 +547,7 @@ class InstagramManager:
         local_path = f"downloads/{post_id}.{ext}"
         
         # Download the file
-        response = requests.get(url, stream=True)
+        response = self.http.get(url, stream=True)
         if response.status_code == 200:
             # If we have a storage handler, save directly to Google Drive
             if self.storage_handler and self.storage_handler.use_google_drive:
@@ -615,7 +621,7 @@ class InstagramManager:
             url (str): URL of the file
             file_path (str): Local path to save the file
         """
-        response = requests.get(url, stream=True)
+        response = self.http.get(url, stream=True)
         if response.status_code == 200:
             with open(file_path, 'wb') as f:
                 for chunk in response.iter_content(1024):
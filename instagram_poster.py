@@ -18,15 +18,16 @@ class InstagramPoster:
         self.temp_dir = tempfile.mkdtemp()
         logger.info(f"Created temporary directory at {self.temp_dir}")
     
-    def login(self, username: str, password: str) -> bool:
-        """Login to Instagram."""
+    def login(self, username: str, password: Optional[str] = None,
+              settings: Optional[Dict[str, Any]] = None) -> bool:
+        """Login to Instagram, resuming a cached session when possible."""
         try:
             logger.info("Initializing mobile Instagram client...")
             self.client = MobileInstagramClient()
-            
+
             # Attempt login with our mobile client
             logger.info("Attempting to log in...")
-            success = self.client.login(username, password)
+            success = self.client.login(username, password, settings=settings)
             
             if success:
                 logger.info("Successfully logged in to Instagram!")
@@ -45,6 +46,10 @@ class InstagramPoster:
             logger.error(f"Login failed: {str(e)}")
             raise
     
+    def get_settings(self) -> Optional[Dict[str, Any]]:
+        """Return the logged-in client's session settings, if any."""
+        return self.client.get_settings() if self.client else None
+
     def repost_to_instagram(self, media_path: str, caption: str, original_url: str = '') -> bool:
         """Repost media to Instagram with attribution."""
         try:
@@ -1,5 +1,10 @@
 import os
+import re
+import asyncio
+import hashlib
 import logging
+from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from dotenv import load_dotenv
 from telegram.ext import (
@@ -8,12 +13,9 @@ from telegram.ext import (
 )
 from telegram import Update
 from telegram.constants import ParseMode
-from instagram_handler import InstagramHandler
+from instagram_handler import get_handler
 from instagram_poster import InstagramPoster
 from storage import StorageHandler
-import threading
-import http.server
-import socketserver
 
 # Check if we're running on Render and need to set up credentials
 if os.getenv('RENDER', 'false').lower() == 'true':
@@ -30,19 +32,129 @@ load_dotenv()
 # Enable logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.DEBUG  # Changed to DEBUG level
+    level=os.getenv('LOG_LEVEL', 'INFO')
 )
 logger = logging.getLogger(__name__)
 
-# Add console handler for immediate feedback
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-logger.addHandler(console_handler)
-
 # States
 (WAITING_FOR_URL, WAITING_FOR_USERNAME, WAITING_FOR_PASSWORD,
  WAITING_FOR_CAPTION, WAITING_FOR_REPOST_USERNAME, WAITING_FOR_REPOST_PASSWORD) = range(6)
 
+@dataclass(slots=True)
+class Session:
+    """Instagram session data for a logged-in Telegram user.
+
+    Holds the client's session settings instead of the plaintext password;
+    password_sha is kept only to detect credential changes.
+    """
+    username: str
+    settings: dict = None
+    password_sha: str = ''
+
+
+def _password_sha(password: str) -> str:
+    """Digest used to compare credentials without retaining them."""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+# Single compiled pass over exception text instead of repeated lowercased
+# substring scans; keys are the matched token with spaces normalized to '_'
+_ERR_RE = re.compile(
+    r"login[_ ]required|rate limit|challenge_required|network_error|invalid_user|bad_password",
+    re.IGNORECASE
+)
+
+def _classify_error(exc) -> str:
+    """Map an exception to a canonical error key, or '' if unrecognized."""
+    m = _ERR_RE.search(str(exc))
+    return m.group(0).lower().replace(' ', '_') if m else ''
+
+# Replies and next conversation state for known download errors
+_URL_ERROR_REPLIES = {
+    'login_required': (
+        "🔐 This post requires authentication.\n"
+        "Please provide your Instagram credentials.\n\n"
+        "First, send your Instagram username:",
+        WAITING_FOR_USERNAME
+    ),
+    'rate_limit': (
+        "⏳ Instagram rate limit reached.\n"
+        "Please wait a few minutes and try again.",
+        ConversationHandler.END
+    ),
+    'challenge_required': (
+        "❌ Login requires verification.\n"
+        "Please log in to Instagram app and approve the login request.",
+        ConversationHandler.END
+    ),
+}
+
+# Static reply texts built once at import instead of per handler call
+WELCOME_BACK_TEXT = (
+    "👋 Welcome back to InstaBot!\n\n"
+    "You're already logged in. Send me an Instagram post URL to repost it."
+)
+
+WELCOME_TEXT = (
+    "👋 Welcome to InstaBot!\n\n"
+    "First, let's log in to your Instagram account.\n"
+    "Please send your Instagram username:"
+)
+
+HELP_TEXT = (
+    "🤔 Need help? Here's a quick guide:\n\n"
+    "1. Start by sending /start to begin the conversation.\n"
+    "2. Send your Instagram username and password to log in.\n"
+    "3. Send an Instagram post URL to download and repost it.\n"
+    "4. Send a new caption for the reposted content.\n"
+    "5. Use /logout to log out of your Instagram account.\n"
+    "6. Use /whoami to view your current Instagram account information.\n\n"
+    "If you have any issues or questions, feel free to ask!"
+)
+
+FALLBACK_TEXT = (
+    "I'm not sure what you mean. Here are the commands you can use:\n\n"
+    "/start - Start using the bot and log in to Instagram\n"
+    "/help - Show help information\n"
+    "/status - Check the bot's status\n"
+    "/logout - Log out from your Instagram account\n"
+    "/cancel - Cancel the current operation"
+)
+
+CANCEL_TEXT = (
+    "Operation cancelled.\n\n"
+    "Use /start to begin again."
+)
+
+# /whoami templates, composed once; filled with format_map at request time
+WHOAMI_TMPL = (
+    "<b>Account Details</b>\n"
+    "Full Name: {full_name}\n"
+    "Followers: {follower_count}\n"
+    "Following: {following_count}\n"
+    "Posts: {media_count}\n"
+    "Bio: {biography}"
+)
+
+# Replies for known login errors; all return the user to the username prompt
+_LOGIN_ERROR_REPLIES = {
+    'network_error': (
+        "❌ Network connection error!\n\n"
+        "Could not reach Instagram servers. Please check your internet connection and try again later."
+    ),
+    'challenge_required': (
+        "❌ Instagram security challenge required!\n\n"
+        "Please login to your Instagram account through the app or website first to complete any security verifications, then try again."
+    ),
+    'invalid_user': (
+        "❌ Invalid Instagram username!\n\n"
+        "The username you provided doesn't seem to exist or might be suspended. Please double-check and try again."
+    ),
+    'bad_password': (
+        "❌ Incorrect password!\n\n"
+        "The password you provided is incorrect. Please try again."
+    ),
+}
+
 class InstaBot:
     """
     A Telegram bot that can download and repost Instagram content.
@@ -55,16 +167,13 @@ class InstaBot:
         Args:
             token (str, optional): Custom token for the bot. If None, will use TELEGRAM_TOKEN from env.
         """
-        # Load environment variables
-        load_dotenv()
-        
-        # Set up token
+        # Set up token (environment already loaded at module import)
         self.token = token or os.getenv('TELEGRAM_TOKEN')
         if not self.token:
             raise ValueError("TELEGRAM_TOKEN environment variable not set")
             
         # Set up storage and user sessions
-        self.instagram = InstagramHandler()
+        self.instagram = get_handler()
         self.poster = InstagramPoster()
         
         # Initialize storage with Google Drive support
@@ -75,106 +184,111 @@ class InstaBot:
             credentials_file=os.getenv('GOOGLE_DRIVE_CREDENTIALS', 'credentials.json')
         )
         
-        # Keep track of logged in users
-        self.logged_in_users = set()
-        # Store Instagram sessions
-        self.user_sessions = {}
-        
+        # Instagram sessions keyed by Telegram user ID; presence == logged in
+        self.sessions = {}
+
+        # Per-user locks so one user's download/repost can't interleave with
+        # itself while other users proceed in parallel
+        self._user_locks = {}
+
         # Load stored credentials
         self._load_stored_credentials()
-            
+
+    def _lock(self, user_id) -> asyncio.Lock:
+        """Return the per-user lock, creating it on first use."""
+        return self._user_locks.setdefault(user_id, asyncio.Lock())
+
+    def _persist_credentials(self, user_id, username, password):
+        """Write credentials to storage in the background.
+
+        Storage may round-trip Google Drive; don't make the user wait on it
+        for the login confirmation message.
+        """
+        async def _save():
+            try:
+                await asyncio.to_thread(
+                    self.storage.save_credentials, user_id, username, password
+                )
+            except Exception as e:
+                logger.error("Failed to persist credentials for %s: %s", user_id, e)
+
+        asyncio.create_task(_save())
+
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Start the conversation and ask for Instagram credentials."""
         user_id = update.effective_user.id
-        
-        # Check if already logged in
-        if hasattr(self, 'logged_in_users') and user_id in self.logged_in_users:
-            await update.message.reply_text(
-                "👋 Welcome back to InstaBot!\n\n"
-                "You're already logged in. Send me an Instagram post URL to repost it."
-            )
+
+        # Check if already logged in (__init__ always sets the registry)
+        if user_id in self.sessions:
+            await update.message.reply_text(WELCOME_BACK_TEXT)
             return WAITING_FOR_URL
-        
-        await update.message.reply_text(
-            "👋 Welcome to InstaBot!\n\n"
-            "First, let's log in to your Instagram account.\n"
-            "Please send your Instagram username:"
-        )
+
+        await update.message.reply_text(WELCOME_TEXT)
         return WAITING_FOR_USERNAME
     
     async def process_url(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Process the Instagram URL and download the post."""
         try:
             user_id = update.effective_user.id
-            
+            # Bind the bound method once; this handler replies several times
+            reply = update.message.reply_text
+
             # Check if user is logged in
-            if user_id not in self.logged_in_users:
-                await update.message.reply_text(
+            if user_id not in self.sessions:
+                await reply(
                     "❌ You need to log in first.\n"
                     "Please use /start to log in."
                 )
                 return ConversationHandler.END
-            
+
             post_url = update.message.text
             context.user_data['post_url'] = post_url
-            await update.message.reply_text("⏳ Downloading post...")
-            
+            await reply("⏳ Downloading post...")
+
             try:
-                # Get session if available
-                session = self.user_sessions.get(user_id)
-                username = session['username'] if session else None
-                password = session['password'] if session else None
-                
-                # Try downloading with current session if available
-                post_data = self.instagram.download_instagram_post(
-                    post_url,
-                    instagram_username=username,
-                    instagram_password=password
-                )
+                # Get session if available (no plaintext password is kept;
+                # the download client reuses its own logged-in session)
+                session = self.sessions.get(user_id)
+                username = session.username if session else None
+
+                # Try downloading with current session if available.
+                # The handler is async and runs its blocking instagrapi
+                # calls in worker threads itself, keeping the event loop
+                # serving other updates. The per-user lock serializes this
+                # user's own requests while other users proceed in parallel.
+                async with self._lock(user_id):
+                    post_data = await self.instagram.download_instagram_post(
+                        post_url,
+                        instagram_username=username
+                    )
                 
                 context.user_data['post_data'] = post_data
-                
+
                 # If successful, ask for new caption
-                await update.message.reply_text(
+                await reply(
                     f"✅ Downloaded post from @{post_data['username']}\n\n"
                     f"Original caption:\n{post_data['caption']}\n\n"
                     "Please send me the new caption for reposting."
                 )
                 return WAITING_FOR_CAPTION
-                
+
             except ValueError as e:
                 # Handle validation errors (invalid URL, post not found)
-                await update.message.reply_text(f"❌ {str(e)}")
+                await reply(f"❌ {str(e)}")
                 return WAITING_FOR_URL
-                
+
             except Exception as e:
-                error_msg = str(e).lower()
-                if "login required" in error_msg or "login_required" in error_msg:
-                    await update.message.reply_text(
-                        "🔐 This post requires authentication.\n"
-                        "Please provide your Instagram credentials.\n\n"
-                        "First, send your Instagram username:"
-                    )
-                    return WAITING_FOR_USERNAME
-                elif "rate limit" in error_msg:
-                    await update.message.reply_text(
-                        "⏳ Instagram rate limit reached.\n"
-                        "Please wait a few minutes and try again."
-                    )
-                    return ConversationHandler.END
-                elif "challenge_required" in error_msg:
-                    await update.message.reply_text(
-                        "❌ Login requires verification.\n"
-                        "Please log in to Instagram app and approve the login request."
-                    )
-                    return ConversationHandler.END
-                else:
-                    await update.message.reply_text(
-                        f"❌ Error: {str(e)}\n"
-                        "Please try again or contact support if the issue persists."
-                    )
-                    return WAITING_FOR_URL
-            
+                known = _URL_ERROR_REPLIES.get(_classify_error(e))
+                if known:
+                    text, next_state = known
+                    await reply(text)
+                    return next_state
+                await reply(
+                    f"❌ Error: {str(e)}\n"
+                    "Please try again or contact support if the issue persists."
+                )
+                return WAITING_FOR_URL
+
         except Exception as e:
             await update.message.reply_text(f"❌ Error: {str(e)}\nPlease try again with a valid Instagram post URL.")
             return WAITING_FOR_URL
@@ -222,18 +336,27 @@ class InstaBot:
             await update.message.reply_text("🔄 Logging in to Instagram...")
             
             try:
-                # Try to login
-                self.poster.login(username, password)
-                
-                # Store the session
-                self.logged_in_users.add(user_id)
-                self.user_sessions[user_id] = {
-                    'username': username,
-                    'password': password
-                }
-                
-                # Save credentials to storage
-                self.storage.save_credentials(user_id, username, password)
+                # Try to login (blocking API call, run off the event loop)
+                await asyncio.to_thread(self.poster.login, username, password)
+
+                # Store the session settings and drop the plaintext password;
+                # only hit storage when the credentials actually changed
+                # (re-logins with the same pair are common)
+                existing = self.sessions.get(user_id)
+                password_sha = _password_sha(password)
+                self.sessions[user_id] = Session(
+                    username, self.poster.get_settings(), password_sha
+                )
+                if not (existing and existing.username == username
+                        and existing.password_sha == password_sha):
+                    self._persist_credentials(user_id, username, password)
+
+                # Also authenticate the download client while we still have
+                # the password (failure only affects auth-required posts)
+                try:
+                    await self.instagram.login(username, password)
+                except Exception as e:
+                    logger.warning("Download client login failed for %s: %s", username, e)
                 
                 # Clear login flag
                 context.user_data['login_in_progress'] = False
@@ -257,8 +380,9 @@ class InstaBot:
                 if not media_path or not caption:
                     raise Exception("Missing media path or caption")
                 
-                # Attempt to repost
-                success = self.poster.repost_to_instagram(
+                # Attempt to repost off the event loop (upload is slow I/O)
+                success = await asyncio.to_thread(
+                    self.poster.repost_to_instagram,
                     media_path=media_path,
                     caption=caption,
                     original_url=original_url
@@ -279,7 +403,7 @@ class InstaBot:
                     return WAITING_FOR_URL
                     
             except Exception as e:
-                logging.error(f"Exception during Instagram posting: {str(e)}", exc_info=True)
+                logging.error("Exception during Instagram posting: %s", e, exc_info=True)
                 await update.message.reply_text(
                     f"❌ Error: {str(e)}\n"
                     "Please try again with /start"
@@ -323,19 +447,24 @@ class InstaBot:
             await update.message.reply_text("🔄 Logging in to Instagram...")
             
             try:
-                # Attempt to log in to Instagram
-                success = self.poster.login(username, password)
+                # Attempt to log in to Instagram (blocking API call)
+                success = await asyncio.to_thread(self.poster.login, username, password)
                 
                 if success:
-                    # Store user info in the user_data
-                    context.user_data['instagram'] = {
-                        'username': username,
-                        'password': password
-                    }
-                    
-                    # Add user to logged in users
-                    self.logged_in_users.add(user_id)
-                    
+                    # Store the session settings; the plaintext password is
+                    # discarded once login has succeeded
+                    self.sessions[user_id] = Session(
+                        username, self.poster.get_settings(), _password_sha(password)
+                    )
+
+                    # Also authenticate the download client while we still
+                    # have the password, so auth-required posts work later;
+                    # public downloads don't need it, so failure is not fatal
+                    try:
+                        await self.instagram.login(username, password)
+                    except Exception as e:
+                        logger.warning("Download client login failed for %s: %s", username, e)
+
                     await update.message.reply_text(
                         f"✅ Successfully logged in as {username}!\n\n"
                         "Now send me an Instagram post URL to download and repost."
@@ -349,34 +478,10 @@ class InstaBot:
                     return WAITING_FOR_PASSWORD
                     
             except Exception as e:
-                error_message = str(e).lower()
-                
-                if "network_error" in error_message:
-                    await update.message.reply_text(
-                        "❌ Network connection error!\n\n"
-                        "Could not reach Instagram servers. Please check your internet connection and try again later."
-                    )
-                elif "challenge_required" in error_message:
-                    await update.message.reply_text(
-                        "❌ Instagram security challenge required!\n\n"
-                        "Please login to your Instagram account through the app or website first to complete any security verifications, then try again."
-                    )
-                elif "invalid_user" in error_message:
-                    await update.message.reply_text(
-                        "❌ Invalid Instagram username!\n\n"
-                        "The username you provided doesn't seem to exist or might be suspended. Please double-check and try again."
-                    )
-                elif "bad_password" in error_message:
-                    await update.message.reply_text(
-                        "❌ Incorrect password!\n\n"
-                        "The password you provided is incorrect. Please try again."
-                    )
-                else:
-                    await update.message.reply_text(
-                        f"❌ Login failed: {str(e)}\n"
-                        "Please try again with /start"
-                    )
-                
+                reply = _LOGIN_ERROR_REPLIES.get(_classify_error(e))
+                await update.message.reply_text(
+                    reply or f"❌ Login failed: {str(e)}\nPlease try again with /start"
+                )
                 return WAITING_FOR_USERNAME
             
         except Exception as e:
@@ -395,9 +500,10 @@ class InstaBot:
             new_caption = update.message.text
             post_data = context.user_data.get('post_data')
             user_id = update.effective_user.id
-            
+            reply = update.message.reply_text
+
             if not post_data:
-                await update.message.reply_text("❌ Session expired. Please start over with /start")
+                await reply("❌ Session expired. Please start over with /start")
                 return ConversationHandler.END
             
             # Store caption and post data for later
@@ -407,11 +513,11 @@ class InstaBot:
                 if not media_files:
                     raise KeyError("No media files found")
                     
-                media_path = media_files[0]['path']
+                media_path = media_files[0].path
                 original_url = post_data.get('original_url', '')
                 
                 if not os.path.exists(media_path):
-                    await update.message.reply_text(
+                    await reply(
                         "❌ Error: Media file not found.\n"
                         "Please try downloading the post again."
                     )
@@ -424,52 +530,59 @@ class InstaBot:
                     'original_url': original_url
                 }
             except (KeyError, IndexError) as e:
-                await update.message.reply_text(
+                await reply(
                     "❌ Error: Could not find downloaded media.\n"
                     "Please try downloading the post again."
                 )
-                logger.error(f"Failed to process media: {str(e)}")
+                logger.error("Failed to process media: %s", e)
                 return ConversationHandler.END
             
             # Check if user is already logged in
-            if user_id in self.logged_in_users:
-                session = self.user_sessions.get(user_id)
-                if session:
-                    await update.message.reply_text("⏳ Reposting to Instagram...")
-                    try:
-                        # Ensure we're logged in with current session
-                        self.poster.login(session['username'], session['password'])
-                        
+            session = self.sessions.get(user_id)
+            if session:
+                await reply("⏳ Reposting to Instagram...")
+                try:
+                    # Ensure we're logged in with current session; both the
+                    # login and the upload are blocking, so run them in a
+                    # worker thread. The per-user lock stops a user from
+                    # kicking off overlapping reposts.
+                    async with self._lock(user_id):
+                        await asyncio.to_thread(
+                            self.poster.login, session.username,
+                            settings=session.settings
+                        )
+
                         # Attempt to repost
-                        success = self.poster.repost_to_instagram(
+                        success = await asyncio.to_thread(
+                            self.poster.repost_to_instagram,
                             media_path,
                             new_caption,
                             original_url
                         )
-                        
-                        if success:
-                            await update.message.reply_text(
-                                "✅ Successfully reposted to Instagram!\n"
-                                "Send another URL to repost more content."
-                            )
-                            return WAITING_FOR_URL
-                        else:
-                            logging.error("Instagram posting returned False")
-                            await update.message.reply_text(
-                                "❌ Failed to post to Instagram. Check logs for details.\n"
-                                "You can try again by sending another URL."
-                            )
-                            return WAITING_FOR_URL
-                    except Exception as e:
-                        # If repost fails, remove user from logged in users and ask to log in again
-                        self.logged_in_users.remove(user_id)
-                        await update.message.reply_text(
-                            f"❌ Repost failed: {str(e)}\n"
-                            "Please log in again."
+
+                    if success:
+                        await reply(
+                            "✅ Successfully reposted to Instagram!\n"
+                            "Send another URL to repost more content."
                         )
-            
+                        return WAITING_FOR_URL
+                    else:
+                        logging.error("Instagram posting returned False")
+                        await reply(
+                            "❌ Failed to post to Instagram. Check logs for details.\n"
+                            "You can try again by sending another URL."
+                        )
+                        return WAITING_FOR_URL
+                except Exception as e:
+                    # If repost fails, drop the session and ask to log in again
+                    self.sessions.pop(user_id, None)
+                    await reply(
+                        f"❌ Repost failed: {str(e)}\n"
+                        "Please log in again."
+                    )
+
             # If we get here, user needs to log in
-            await update.message.reply_text(
+            await reply(
                 "✅ Caption saved!\n\n"
                 "Please send your Instagram username to proceed:"
             )
@@ -484,21 +597,17 @@ class InstaBot:
     
     async def cancel(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Cancel the conversation."""
-        await update.message.reply_text(
-            "Operation cancelled.\n\n"
-            "Use /start to begin again."
-        )
+        await update.message.reply_text(CANCEL_TEXT)
         return ConversationHandler.END
         
     async def logout(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Log out the user from their Instagram account."""
         user_id = update.effective_user.id
         
-        if user_id in self.logged_in_users:
-            self.logged_in_users.remove(user_id)
-            if user_id in self.user_sessions:
-                del self.user_sessions[user_id]
-            
+        if user_id in self.sessions:
+            del self.sessions[user_id]
+            self._user_locks.pop(user_id, None)
+
             await update.message.reply_text(
                 "✅ You have been logged out of your Instagram account.\n\n"
                 "Use /start to log in again."
@@ -513,22 +622,13 @@ class InstaBot:
         
     async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Send a message when the command /help is issued."""
-        await update.message.reply_text(
-            "🤔 Need help? Here's a quick guide:\n\n"
-            "1. Start by sending /start to begin the conversation.\n"
-            "2. Send your Instagram username and password to log in.\n"
-            "3. Send an Instagram post URL to download and repost it.\n"
-            "4. Send a new caption for the reposted content.\n"
-            "5. Use /logout to log out of your Instagram account.\n"
-            "6. Use /whoami to view your current Instagram account information.\n\n"
-            "If you have any issues or questions, feel free to ask!"
-        )
+        await update.message.reply_text(HELP_TEXT)
     
     async def status(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Send a message when the command /status is issued."""
         await update.message.reply_text(
             "🔄 Bot status: Online\n"
-            "📊 Users logged in: {}\n".format(len(self.logged_in_users))
+            "📊 Users logged in: {}\n".format(len(self.sessions))
         )
     
     async def error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -541,33 +641,25 @@ class InstaBot:
     
     async def fallback_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle messages that don't match any other handler."""
-        await update.message.reply_text(
-            "I'm not sure what you mean. Here are the commands you can use:\n\n"
-            "/start - Start using the bot and log in to Instagram\n"
-            "/help - Show help information\n"
-            "/status - Check the bot's status\n"
-            "/logout - Log out from your Instagram account\n"
-            "/cancel - Cancel the current operation"
-        )
+        await update.message.reply_text(FALLBACK_TEXT)
     
     async def whoami(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Display information about the currently logged-in Instagram account."""
         user_id = update.effective_user.id
         
         # Check if the user is logged in
-        if user_id not in self.logged_in_users:
+        if user_id not in self.sessions:
             await update.message.reply_text(
                 "❌ You are not logged in to any Instagram account.\n"
                 "Use /start to log in with your Instagram credentials."
             )
             return WAITING_FOR_USERNAME if context.user_data.get('state') == WAITING_FOR_USERNAME else ConversationHandler.END
-        
-        # Get user's Instagram credentials from user_sessions (more reliable)
-        session_data = self.user_sessions.get(user_id, {})
-        username = session_data.get('username', 'Unknown')
-        
-        logger.debug(f"Retrieved username from session: {username}")
-        logger.debug(f"User sessions: {self.user_sessions}")
+
+        # Get user's Instagram credentials from the session registry (more reliable)
+        session = self.sessions.get(user_id)
+        username = session.username if session else 'Unknown'
+
+        logger.debug("Retrieved username from session: %s", username)
         
         # Attempt to get additional account info if possible
         account_info = "No additional account information available."
@@ -577,32 +669,22 @@ class InstaBot:
                 user_info = self.poster.api.username_info(username)
                 if user_info and 'user' in user_info:
                     user = user_info['user']
-                    account_info = (
-                        "<b>Account Details</b>\n"
-                        "Full Name: {}\n"
-                        "Followers: {}\n"
-                        "Following: {}\n"
-                        "Posts: {}\n"
-                        "Bio: {}"
-                    ).format(
-                        user.get('full_name', 'Not available'),
-                        user.get('follower_count', 'Unknown'),
-                        user.get('following_count', 'Unknown'),
-                        user.get('media_count', 'Unknown'),
-                        user.get('biography', 'No bio')
+                    # defaultdict fills any field the API left out
+                    account_info = WHOAMI_TMPL.format_map(
+                        defaultdict(lambda: 'Unknown', user)
                     )
         except Exception as e:
-            logger.error(f"Error fetching Instagram account details: {str(e)}")
+            logger.error("Error fetching Instagram account details: %s", e)
             account_info = "Could not fetch detailed account information."
-        
+
         # Send the response using HTML formatting
         response_text = (
-            "<b>Instagram Account Information</b>\n\n"
-            "Currently logged in as: <code>" + username + "</code>\n\n"
-            + account_info + "\n\n"
-            "Use /logout to sign out."
+            f"<b>Instagram Account Information</b>\n\n"
+            f"Currently logged in as: <code>{username}</code>\n\n"
+            f"{account_info}\n\n"
+            f"Use /logout to sign out."
         )
-        
+
         await update.message.reply_text(
             response_text,
             parse_mode=ParseMode.HTML
@@ -652,84 +734,94 @@ class InstaBot:
                     MessageHandler(filters.TEXT & ~filters.COMMAND, self.process_repost_password)
                 ]
             },
-            fallbacks=[CommandHandler('cancel', self.cancel)],
+            fallbacks=[
+                CommandHandler('cancel', self.cancel),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, self.fallback_handler),
+            ],
             name="instagram_conversation"
         )
-        
+
         app.add_handler(conv_handler)
         app.add_handler(CommandHandler("help", self.help_command))
         app.add_handler(CommandHandler("status", self.status))
         app.add_handler(CommandHandler("logout", self.logout))
         app.add_handler(CommandHandler("whoami", self.whoami))
-        
-        # Add a global fallback handler for messages not caught by other handlers
-        app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.fallback_handler))
-        
+
         app.add_error_handler(self.error_handler)
 
+    async def _post_init(self, app):
+        """Run startup work on the application's own event loop.
+
+        Deletes any existing webhook through PTB's pooled HTTP client instead
+        of a blocking requests call, so startup doesn't stall the event loop.
+        """
+        try:
+            await app.bot.delete_webhook(drop_pending_updates=True)
+            logger.info("Deleted any existing webhook")
+        except Exception as e:
+            logger.error("Error deleting webhook: %s", e)
+
+        # Set up bot commands menu before the first updates are dispatched
+        await self.set_commands(app)
+
     def run(self):
         """Start the bot."""
         # Create a unique session name with timestamp to avoid conflicts
         import time
         session_name = f"insta_bot_{int(time.time())}"
-        app = Application.builder().token(self.token).concurrent_updates(True).build()
-        
-        # Explicitly delete webhook to avoid conflicts
-        logger.info("Deleting any existing webhook...")
-        try:
-            import requests
-            response = requests.get(f"https://api.telegram.org/bot{self.token}/deleteWebhook?drop_pending_updates=true")
-            logger.info(f"Webhook deletion response: {response.json()}")
-        except Exception as e:
-            logger.error(f"Error deleting webhook: {e}")
-        
+        # Bound concurrent update processing so a burst can't spawn an
+        # unbounded number of tasks; per-user locks keep ordering per chat
+        app = Application.builder().token(self.token).concurrent_updates(32).post_init(self._post_init).build()
+
         # Register handlers
         self.register_handlers(app)
-        
-        # Set up bot commands menu
-        app.create_task(self.set_commands(app))
-        
+
         # Start the bot
         print("Bot starting...")
         logging.info("Bot starting...")
-        app.run_polling(poll_interval=1.0)
+        # Long-poll instead of sleeping 1s between getUpdates calls
+        app.run_polling(poll_interval=0, timeout=30, drop_pending_updates=True)
     
     def _load_stored_credentials(self):
         """Load stored credentials from storage."""
         try:
-            stored_credentials = self.storage.load_all_credentials()
-            # Convert list of credentials to a dictionary keyed by user_id
-            for creds in stored_credentials:
-                if 'user_id' in creds:
-                    user_id = int(creds['user_id'])
-                    self.user_sessions[user_id] = {
-                        'username': creds['username'],
-                        'password': creds['password']
-                    }
-                    self.logged_in_users.add(user_id)
+            stored_credentials = self.storage.load_all_credentials() or []
+            # Populate the session registry in a single pass. Only the
+            # username and a password digest are kept in memory; the client
+            # resumes from its on-disk session cache when these users post.
+            self.sessions = {
+                int(creds['user_id']): Session(
+                    creds['username'],
+                    password_sha=_password_sha(creds.get('password', ''))
+                )
+                for creds in stored_credentials if 'user_id' in creds
+            }
         except Exception as e:
-            logging.error(f"Failed to load stored credentials: {e}")
-
-# Simple HTTP request handler for Render
-class SimpleHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        self.send_response(200)
-        self.send_header('Content-type', 'text/html')
-        self.end_headers()
-        self.wfile.write(b'Instagram Bot is running!')
+            logging.error("Failed to load stored credentials: %s", e)
 
 def start_web_server():
     """Start a simple web server to keep Render happy"""
+    # Only needed on Render, so keep the stdlib server out of normal startup
+    import http.server
+    import socketserver
+
+    class SimpleHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-type', 'text/html')
+            self.end_headers()
+            self.wfile.write(b'Instagram Bot is running!')
+
     port = int(os.getenv('PORT', 10000))
-    handler = SimpleHTTPRequestHandler
-    
-    with socketserver.TCPServer(("", port), handler) as httpd:
+
+    with socketserver.TCPServer(("", port), SimpleHTTPRequestHandler) as httpd:
         print(f"Web server running on port {port}")
         httpd.serve_forever()
 
 if __name__ == '__main__':
     # Start web server in a separate thread for Render
     if os.getenv('RENDER', 'false').lower() == 'true':
+        import threading
         web_thread = threading.Thread(target=start_web_server)
         web_thread.daemon = True
         web_thread.start()
@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
 """
 Webhook-based launcher for the Instagram bot on Render.com
+
+Telegram pushes updates straight into a FastAPI endpoint served by
+uvicorn, so updates are handled on the bot's own event loop with no
+polling delay, no worker thread and no per-update asyncio.run().
 """
 import os
 import logging
-import asyncio
-from bot import InstaBot
-from dotenv import load_dotenv
 import base64
-from flask import Flask, request, Response
-from threading import Thread
-from queue import Queue
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request, Response
 from telegram import Update
 
+import fastjson
+from bot import InstaBot
+
 # Set up logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -20,16 +25,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create Flask app for webhook handling
-app = Flask(__name__)
-
-# Configuration for persistent storage with Flask
-app.config['CONVERSATION_PERSISTENCE'] = True
-
-# Create a global application instance
+# Populated on startup by the lifespan handler
 APP_INSTANCE = None
 BOT_INSTANCE = None
 
+
 # Function to create credentials file from base64 string if provided
 def setup_credentials():
     """Set up credentials.json from environment variable if available."""
@@ -47,99 +47,92 @@ def setup_credentials():
             logger.error(f"Failed to create credentials.json from environment variable: {e}")
     return False
 
-async def setup_bot():
-    """Set up and initialize the bot."""
+
+@asynccontextmanager
+async def lifespan(_app):
+    """Initialize the bot on startup and shut it down cleanly on exit."""
     global BOT_INSTANCE, APP_INSTANCE
-    
+
     # Get token from environment or use default
     token = os.getenv('TELEGRAM_TOKEN', "").strip()
-    
+
     if not token:
         raise ValueError("TELEGRAM_TOKEN environment variable is required")
-    
+
     # Get webhook URL from environment or use default based on Render URL
     webhook_url = os.getenv('WEBHOOK_URL', "")
     if not webhook_url and os.getenv('RENDER_EXTERNAL_URL'):
         webhook_url = f"{os.getenv('RENDER_EXTERNAL_URL')}/webhook/{token}"
-    
+
     if not webhook_url:
         raise ValueError("WEBHOOK_URL or RENDER_EXTERNAL_URL environment variable is required")
-    
-    # Create a bot instance
+
+    # Create a bot instance and register the webhook with Telegram
     BOT_INSTANCE = InstaBot(token=token)
-    
-    # Set up the application with the webhook
-    APP_INSTANCE = await BOT_INSTANCE.setup_webhook(webhook_url)
-    
+    APP_INSTANCE = await BOT_INSTANCE.setup_webhook(
+        webhook_url, secret_token=os.getenv('WEBHOOK_SECRET') or None
+    )
+
     logger.info(f"Bot initialized with webhook at {webhook_url}")
-    return BOT_INSTANCE
+    try:
+        yield
+    finally:
+        await APP_INSTANCE.stop()
+        await APP_INSTANCE.shutdown()
 
-# Use a queue for processing updates to avoid concurrency issues
-update_queue = Queue()
 
-def process_update_worker():
-    """Worker thread to process updates from the queue."""
-    while True:
-        try:
-            update_json, token = update_queue.get()
-            if update_json:
-                # Process the update
-                asyncio.run(APP_INSTANCE.process_update(
-                    Update.de_json(update_json, APP_INSTANCE.bot)
-                ))
-            update_queue.task_done()
-        except Exception as e:
-            logger.error(f"Error processing update: {e}")
+app = FastAPI(lifespan=lifespan)
 
-# Start worker thread
-worker_thread = Thread(target=process_update_worker, daemon=True)
-worker_thread.start()
 
-@app.route('/')
-def index():
+@app.get('/')
+async def index():
     """Basic healthcheck endpoint."""
-    return "Instagram Bot is running in webhook mode!"
+    return Response("Instagram Bot is running in webhook mode!")
 
-@app.route(f'/webhook/<token>', methods=['POST'])
-def webhook(token):
+
+@app.post('/webhook/{token}')
+async def webhook(token: str, request: Request):
     """Handle webhook updates from Telegram."""
     # Verify token
     if token != os.getenv('TELEGRAM_TOKEN', "").strip():
-        return Response("Unauthorized", status=403)
-    
-    # Process update
-    if APP_INSTANCE:
-        update_json = request.get_json()
-        logger.debug(f"Received update: {update_json.get('update_id', 'unknown')}")
-        
-        # Add to queue for processing
-        update_queue.put((update_json, token))
-        
-        return Response("OK", status=200)
-    
-    return Response("Bot not initialized", status=500)
+        return Response("Unauthorized", status_code=403)
+
+    # Verify the secret header if one was registered with the webhook
+    secret = os.getenv('WEBHOOK_SECRET')
+    if secret and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != secret:
+        return Response("Unauthorized", status_code=403)
+
+    if APP_INSTANCE is None:
+        return Response("Bot not initialized", status_code=500)
+
+    # Parse the raw body with the fast JSON shim rather than Starlette's
+    # stdlib parser, then hand the update to the application's queue and
+    # return 200 right away. Conversation steps can block for a while
+    # (an Instagram login may back off through several attempts); running
+    # them inline would make Telegram time out and redeliver the update.
+    update = Update.de_json(fastjson.loads(await request.body()), APP_INSTANCE.bot)
+    logger.debug(f"Received update: {update.update_id}")
+    await APP_INSTANCE.update_queue.put(update)
+
+    return Response("OK")
+
 
 def main():
     """Main function to start the bot and web server."""
     # Load environment variables
     load_dotenv()
-    
+
     # Set up Google Drive credentials
     setup_credentials()
-    
-    # Set up the bot asynchronously
-    try:
-        asyncio.run(setup_bot())
-    except Exception as e:
-        logger.error(f"Error setting up bot: {e}", exc_info=True)
-        return
-    
+
     # Get port from environment or use default
     port = int(os.getenv('PORT', 10000))
-    
-    # Start the Flask server
+
+    # Start the ASGI server; a single worker keeps the bot state in-process
+    import uvicorn
     logger.info(f"Starting web server on port {port}")
-    app.run(host='0.0.0.0', port=port)
+    uvicorn.run(app, host='0.0.0.0', port=port, workers=1)
+
 
 if __name__ == "__main__":
     main()
@@ -3,6 +3,8 @@ import json
 import logging
 from typing import Dict, Any, List, Optional
 
+import fastjson
+
 # Import the Google Drive handler
 from google_drive_handler import GoogleDriveHandler
 
@@ -23,6 +25,9 @@ class StorageHandler:
         self.credentials_file = os.path.abspath(credentials_file)
         self.use_google_drive = use_google_drive
         self.google_drive = None
+
+        # Telegram file_id cache keyed by Instagram shortcode, loaded lazily
+        self._file_id_cache = None
         
         # Create local data directory if it doesn't exist
         if not os.path.exists(data_dir):
@@ -66,7 +71,7 @@ class StorageHandler:
         local_path = os.path.join(user_dir, "credentials.json")
         try:
             with open(local_path, 'w') as f:
-                json.dump(credentials, f)
+                f.write(fastjson.dumps(credentials))
             logger.info(f"Saved credentials locally for user {user_id}")
             
             # Save to Google Drive if enabled
@@ -109,7 +114,7 @@ class StorageHandler:
         if os.path.exists(creds_path):
             try:
                 with open(creds_path, 'r') as f:
-                    credentials = json.load(f)
+                    credentials = fastjson.loads(f.read())
                 logger.info(f"Loaded credentials locally for user {user_id}")
                 return credentials
             except Exception as e:
@@ -145,7 +150,7 @@ class StorageHandler:
                     if os.path.exists(creds_path):
                         try:
                             with open(creds_path, 'r') as f:
-                                credentials = json.load(f)
+                                credentials = fastjson.loads(f.read())
                                 # Only add if not already in list
                                 if not any(c.get("user_id") == credentials.get("user_id") for c in all_credentials):
                                     all_credentials.append(credentials)
@@ -156,6 +161,60 @@ class StorageHandler:
             
         return all_credentials
     
+    def _file_id_cache_path(self) -> str:
+        return os.path.join(self.data_dir, "file_ids.json")
+
+    def get_file_ids(self, shortcode: str) -> Optional[Dict[str, Any]]:
+        """Return cached Telegram media for an Instagram shortcode.
+
+        Args:
+            shortcode: Instagram post shortcode
+
+        Returns:
+            dict or None: {'caption': ..., 'files': [{'type': ...,
+            'file_id': ...}, ...]} if cached
+        """
+        if self._file_id_cache is None:
+            self._file_id_cache = {}
+            try:
+                if os.path.exists(self._file_id_cache_path()):
+                    with open(self._file_id_cache_path(), 'r') as f:
+                        self._file_id_cache = fastjson.loads(f.read())
+            except Exception as e:
+                logger.error(f"Failed to load file_id cache: {str(e)}")
+
+        entry = self._file_id_cache.get(shortcode)
+        # Entries written before captions were cached are bare file_id
+        # lists; normalize them so callers see one shape
+        if isinstance(entry, list):
+            entry = {'caption': None, 'files': entry}
+        return entry
+
+    def save_file_ids(self, shortcode: str, media: Dict[str, Any]) -> bool:
+        """Cache Telegram media for an Instagram shortcode.
+
+        Args:
+            shortcode: Instagram post shortcode
+            media: {'caption': ..., 'files': [{'type': ..., 'file_id': ...}]}
+
+        Returns:
+            bool: True if save was successful
+        """
+        if not media or not media.get('files'):
+            return False
+
+        # Make sure the cache is loaded before updating it
+        self.get_file_ids(shortcode)
+        self._file_id_cache[shortcode] = media
+
+        try:
+            with open(self._file_id_cache_path(), 'w') as f:
+                f.write(fastjson.dumps(self._file_id_cache))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save file_id cache: {str(e)}")
+            return False
+
     def save_media(self, user_id: int, media_path: str) -> str:
         """Save media file and return the path where it was saved.
         
@@ -255,9 +314,14 @@ class StorageHandler:
                 logger.error("Cannot save session with empty username")
                 return False
                 
-            # Pickle the session data
+            # Pickle the session data with the newest protocol and strip
+            # redundant opcodes; smaller files and faster loads on every
+            # subsequent cached-session login
             import pickle
-            session_bytes = pickle.dumps(session_data)
+            import pickletools
+            session_bytes = pickletools.optimize(
+                pickle.dumps(session_data, protocol=pickle.HIGHEST_PROTOCOL)
+            )
             
             file_name = f"{username.lower()}_session.pkl"
             file_path = os.path.join(self.data_dir, file_name)